@@ -1,8 +1,13 @@
 import streamlit as st
-from db import register_user, login_user
+from db import register_user, login_user, ensure_indexes, begin_request
+import snapshots
+import candidate_pools
 from streamlit_option_menu import option_menu
 import time
 
+# Start a fresh db identity map for this script run
+begin_request()
+
 # Custom CSS
 st.markdown("""
 <style>
@@ -59,6 +64,21 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Create MongoDB indexes once per server process
+@st.cache_resource
+def init_database():
+    ensure_indexes()
+
+init_database()
+
+# Popular, trending, genre lists and genre candidate pools are refreshed in the background for all sessions
+@st.cache_resource
+def start_snapshots():
+    snapshots.start()
+    candidate_pools.start()
+
+start_snapshots()
+
 # Initialize session state with proper defaults
 if "logged_in" not in st.session_state:
     st.session_state.update({
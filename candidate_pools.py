@@ -0,0 +1,113 @@
+import time
+import random
+import threading
+from tmdb import discover, get_background_executor
+import snapshots
+
+# Candidate Pool Configuration
+# Every genre gets a pool of its top discover pages; genre pairs/triples are
+# served by intersecting the pools locally on each item's genre_ids
+MEDIA_TYPES = ("movie", "tv")
+PAGES_PER_GENRE = 3
+POOL_PARAMS = {
+    "sort_by": "popularity.desc",
+    "vote_count.gte": 50,
+    "language": "en-US"
+}
+REFRESH_INTERVAL = 6 * 60 * 60
+RETRY_AFTER = 5 * 60
+INITIAL_WAIT = 2.0
+
+_pools = {media_type: {} for media_type in MEDIA_TYPES}  # media_type -> {genre_id: [items]}
+_lock = threading.Lock()
+_thread = None
+_ready = threading.Event()
+_generation = 0  # Bumped whenever a refresh round updates any pool
+
+def _fetch_pool(media_type, genre_id):
+    """Top PAGES_PER_GENRE discover pages for one genre; None if every page failed"""
+    items, failed = {}, 0
+    for page in range(1, PAGES_PER_GENRE + 1):
+        results = discover(media_type, {**POOL_PARAMS, "with_genres": str(genre_id), "page": page})
+        if not results:
+            failed += 1
+        for item in results:
+            items.setdefault(item["id"], item)
+    return None if failed == PAGES_PER_GENRE else list(items.values())
+
+def refresh():
+    """Rebuild every genre pool in parallel; failed genres keep their previous pool"""
+    jobs = [(media_type, genre["id"]) for media_type in MEDIA_TYPES for genre in snapshots.get(f"genres/{media_type}")]
+    if not jobs:
+        return False
+    global _generation
+    ok, updated = True, False
+    for (media_type, genre_id), pool in zip(jobs, get_background_executor().map(lambda job: _fetch_pool(*job), jobs)):
+        if pool is None:
+            ok = False
+            continue
+        updated = True
+        with _lock:
+            _pools[media_type][genre_id] = pool
+    if updated:
+        with _lock:
+            _generation += 1
+    return ok
+
+def _run():
+    while True:
+        try:
+            ok = refresh()
+        except Exception as e:
+            print("Candidate pool error:", e)  # Keep the thread alive and retry later
+            ok = False
+        _ready.set()
+        time.sleep(REFRESH_INTERVAL if ok else RETRY_AFTER)
+
+def start(wait=INITIAL_WAIT):
+    """Start the background pool builder once per process; the first call waits briefly for data"""
+    global _thread
+    if _thread is None:
+        with _lock:
+            if _thread is not None:
+                return
+            _thread = threading.Thread(target=_run, name="candidate-pools", daemon=True)
+            _thread.start()
+        _ready.wait(wait)
+
+def generation():
+    """Changes whenever the pools are rebuilt, so callers can key cached samples on it (0 = not built yet)"""
+    return _generation
+
+def sample(media_type, genre_ids, exclude=(), limit=20, min_votes=0, min_rating=0):
+    """Random titles from the pools of genre_ids, best genre overlap first, without calling TMDB"""
+    # exclude holds (media_type, id) pairs, e.g. db.get_user_item_keys(username, "watched")
+    start()
+    wanted = set(genre_ids)
+    with _lock:
+        pools = [_pools[media_type].get(genre_id, []) for genre_id in wanted]
+
+    candidates = {}
+    for pool in pools:
+        for item in pool:
+            if (
+                item.get("adult")
+                or (media_type, item["id"]) in exclude
+                or item.get("vote_count", 0) < min_votes
+                or item.get("vote_average", 0) < min_rating
+            ):
+                continue
+            candidates[item["id"]] = item
+
+    # Titles matching all requested genres come first, then those matching fewer
+    by_overlap = {}
+    for item in candidates.values():
+        by_overlap.setdefault(len(wanted & set(item.get("genre_ids", []))), []).append(item)
+    chosen = []
+    for overlap in sorted(by_overlap, reverse=True):
+        group = by_overlap[overlap]
+        random.shuffle(group)
+        chosen.extend(group[:limit - len(chosen)])
+        if len(chosen) >= limit:
+            break
+    return chosen
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+from db import get_items as get_stored_items, upsert_items, item_key
+from tmdb import tmdb_get, get_executor
+import search_index
+
+# Catalog Configuration
+REFRESH_AFTER = timedelta(days=3)
+DETAIL_APPENDS = "watch/providers,external_ids,credits,similar"
+SCHEMA_VERSION = 2  # Bump when normalize_item gains fields; older items are refetched
+CAST_LIMIT = 10
+SIMILAR_LIMIT = 12
+
+def normalize_item(media_type, details):
+    """Turn a TMDB details payload into a catalog document"""
+    release_date = details.get("release_date") or details.get("first_air_date") or ""
+    return {
+        "_id": item_key(media_type, details["id"]),
+        "media_type": media_type,
+        "tmdb_id": details["id"],
+        "title": details.get("title") or details.get("name"),
+        "original_title": details.get("original_title") or details.get("original_name"),
+        "overview": details.get("overview"),
+        "poster_path": details.get("poster_path"),
+        "genres": [g["name"] for g in details.get("genres", [])],
+        "genre_ids": [g["id"] for g in details.get("genres", [])],
+        "vote_average": details.get("vote_average"),
+        "popularity": details.get("popularity"),
+        "release_date": release_date,
+        "release_year": int(release_date[:4]) if release_date[:4].isdigit() else None,
+        "providers": details.get("watch/providers", {}).get("results", {}),
+        "external_ids": details.get("external_ids", {}),
+        "cast": [
+            {"name": c["name"], "character": c.get("character"), "profile_path": c.get("profile_path")}
+            for c in details.get("credits", {}).get("cast", [])[:CAST_LIMIT]
+        ],
+        "directors": [c["name"] for c in details.get("credits", {}).get("crew", []) if c.get("job") == "Director"]
+            or [c["name"] for c in details.get("created_by", [])],
+        "similar": [
+            {
+                "id": s["id"],
+                "title": s.get("title") or s.get("name"),
+                "poster_path": s.get("poster_path"),
+                "vote_average": s.get("vote_average")
+            }
+            for s in details.get("similar", {}).get("results", [])[:SIMILAR_LIMIT]
+        ],
+        "schema": SCHEMA_VERSION,
+        "refreshed_at": datetime.utcnow()
+    }
+
+def fetch_item(media_type, tmdb_id):
+    """Load one title from TMDB (details, providers, external ids, credits and similar titles in one call)"""
+    details = tmdb_get(f"/{media_type}/{tmdb_id}", {"append_to_response": DETAIL_APPENDS})
+    return normalize_item(media_type, details) if details else None
+
+def get_items(keys, executor=None):
+    """Return {(media_type, id): item} from the shared catalog, reading through to TMDB for missing or stale titles"""
+    # executor defaults to the page-serving pool; background callers pass their own
+    keys = list(dict.fromkeys(keys))
+    stored = get_stored_items(keys)
+    now = datetime.utcnow()
+
+    items, refresh = {}, []
+    for key in keys:
+        item = stored.get(item_key(*key))
+        if item:
+            items[key] = item
+        if not item or now - item["refreshed_at"] > REFRESH_AFTER or item.get("schema", 1) < SCHEMA_VERSION:
+            refresh.append(key)
+
+    if refresh:
+        fetched = list((executor or get_executor()).map(lambda key: fetch_item(*key), refresh))
+        upsert_items([item for item in fetched if item])
+        search_index.add([search_index.from_catalog(item) for item in fetched if item])
+        for key, item in zip(refresh, fetched):
+            if item:
+                items[key] = item
+    return items
+
+def get_item(media_type, tmdb_id):
+    return get_items([(media_type, tmdb_id)]).get((media_type, tmdb_id))
+
+def fetch_posters(keys):
+    """Resolve (media_type, id) pairs to poster paths via the catalog"""
+    items = get_items(keys)
+    return {key: items[key]["poster_path"] if key in items else None for key in keys}
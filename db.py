@@ -1,42 +1,183 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, ReplaceOne, UpdateOne, ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError, BulkWriteError, OperationFailure
 import bcrypt
 from dotenv import load_dotenv
 import os
+import math
+import time
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from bson.objectid import ObjectId  # Fix _id issue in MongoDB queries
 
-# Load environment variables
-load_dotenv()
-MONGO_URI = os.getenv("MONGO_URI")
-
 # MongoDB Connection
-client = MongoClient(MONGO_URI)
-db = client["entertainment_recommendation"]
-users_collection = db["users"]
-friends_collection = db["friends"]
-friend_requests_collection = db["friend_requests"]
-recommendations_collection = db["recommendations"]
+# The client is created on first use, not at import, so importing db (every
+# page does) costs no DNS lookups, connection threads or .env parsing
+DATABASE_NAME = "entertainment_recommendation"
+COLLECTIONS = ("users", "friends", "friend_requests", "recommendations", "items", "activity", "user_items")
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Return the process-wide MongoClient, connecting on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                load_dotenv()  # Load environment variables
+                _client = MongoClient(os.getenv("MONGO_URI"))
+    return _client
+
+def get_database():
+    return get_client()[DATABASE_NAME]
+
+def _collection(name):
+    return get_database()[name]
+
+def __getattr__(name):
+    """Resolve db.client, db.db and db.<name>_collection lazily for scripts"""
+    if name == "client":
+        return get_client()
+    if name == "db":
+        return get_database()
+    if name.endswith("_collection") and name[:-len("_collection")] in COLLECTIONS:
+        return _collection(name[:-len("_collection")])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+CONTENT_LISTS = ("watched", "liked")
+
+ACTIVITY_TTL_DAYS = 90  # Feed entries older than this are dropped by a TTL index
+
+# Taste profile configuration: weights decay with a half-life, stored "forward
+# decayed" (scaled by e^(λ·t)) so every update is a plain atomic $inc
+TASTE_HALF_LIFE_DAYS = 90
+TASTE_EPOCH = 1700000000  # Fixed reference time keeps the stored scale bounded
+TASTE_WEIGHTS = {"liked": 8, "watched": 2, "recommendations": 4, "preferences": 5}
+
+# Registration genres mapped to TMDB's movie and TV genre names
+PREFERENCE_GENRES = {
+    "Comedy": ["Comedy"],
+    "Horror": ["Horror"],
+    "Sci-Fi": ["Science Fiction", "Sci-Fi & Fantasy"],
+    "Action": ["Action", "Action & Adventure"],
+    "Drama": ["Drama"],
+    "Romance": ["Romance"]
+}
+
+# 🟢 Per-Rerun Identity Map
+# Pages call begin_request() at the top of each script run. Reads decorated with
+# @_identity_mapped are then served from memory for the rest of that run, and
+# any write clears the map. Without begin_request() (CLI scripts) nothing is cached.
+IDENTITY_MAP_TTL = 30  # Safety net in case a page forgets to start a new request
+
+_request = threading.local()
+
+def begin_request():
+    _request.cache = {}
+    _request.started = time.time()
+
+def _identity_map():
+    cache = getattr(_request, "cache", None)
+    if cache is None or time.time() - _request.started > IDENTITY_MAP_TTL:
+        return None
+    return cache
+
+def _identity_mapped(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        cache = _identity_map()
+        if cache is None:
+            return func(*args, **kwargs)
+        key = (func.__name__, args, tuple(sorted(kwargs.items())))
+        if key not in cache:
+            cache[key] = func(*args, **kwargs)
+        value = cache[key]
+        # Hand out shallow copies so callers reversing/sorting lists don't alter the map
+        return value.copy() if isinstance(value, (list, dict, set)) else value
+    return wrapper
+
+def _invalidates(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        cache = _identity_map()
+        if cache is not None:
+            cache.clear()
+        return func(*args, **kwargs)
+    return wrapper
+
+# 🟢 Startup
+def _create_unique_index(name, keys, **kwargs):
+    """Unique indexes can't build over existing duplicates; report that instead of failing startup"""
+    try:
+        _collection(name).create_index(keys, unique=True, **kwargs)
+    except OperationFailure as e:
+        print(f"Error: unique index on {name} not created, run python -m scripts.dedupe_unique_keys:", e)
+
+def ensure_indexes():
+    _create_unique_index("users", "username")
+
+    # One index per branch of get_friend_requests' $or
+    _collection("friend_requests").create_index([("to_user", ASCENDING), ("status", ASCENDING)])
+    _collection("friend_requests").create_index([("from_user", ASCENDING), ("status", ASCENDING)])
+    # At most one pending request per direction; answered requests are kept as history
+    _create_unique_index(
+        "friend_requests",
+        [("from_user", ASCENDING), ("to_user", ASCENDING), ("status", ASCENDING)],
+        partialFilterExpression={"status": "pending"}
+    )
+
+    # Only active recommendations are ever listed, so index just those
+    _collection("recommendations").create_index(
+        [("to_user", ASCENDING), ("created_at", ASCENDING)],
+        partialFilterExpression={"status": "active"}
+    )
+
+    _collection("friends").create_index([("user1", ASCENDING), ("user2", ASCENDING)])
+
+    # Search loads only catalog items refreshed since its last load
+    _collection("items").create_index("refreshed_at")
+
+    # One document per (username, list, type, id); newest-first pages per list
+    _create_unique_index(
+        "user_items",
+        [("username", ASCENDING), ("list", ASCENDING), ("type", ASCENDING), ("id", ASCENDING)]
+    )
+    _collection("user_items").create_index(
+        [("username", ASCENDING), ("list", ASCENDING), ("added_at", DESCENDING), ("_id", DESCENDING)]
+    )
+
+    # Friend feed: equality on actor/verb, newest first; TTL bounds its size
+    _collection("activity").create_index(
+        [("actor", ASCENDING), ("verb", ASCENDING), ("created_at", DESCENDING)]
+    )
+    _collection("activity").create_index(
+        "created_at", expireAfterSeconds=ACTIVITY_TTL_DAYS * 86400
+    )
 
 # 🟢 User Authentication
+@_invalidates
 def register_user(username, password, preferences):
     hashed_password = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
 
-    if users_collection.find_one({"username": username}):
-        return False  # Username already exists
-
-    users_collection.insert_one({
-        "username": username,
-        "password": hashed_password,
-        "preferences": preferences,
-        "watched": [],
-        "liked": [],
-        "friends": [],
-        "friend_requests": []
-    })
+    seed_genres = [name for pref in preferences for name in PREFERENCE_GENRES.get(pref, [pref])]
+    try:
+        _collection("users").insert_one({
+            "username": username,
+            "password": hashed_password,
+            "preferences": preferences,
+            "friends": [],
+            "friend_requests": [],
+            "taste": _taste_increments(seed_genres, TASTE_WEIGHTS["preferences"], prefix=""),
+            "taste_initialized": True
+        })
+    except DuplicateKeyError:
+        return False  # Username already exists (unique index on users.username)
     return True
 
 def login_user(username, password):
-    user = users_collection.find_one({"username": username})
+    user = _collection("users").find_one({"username": username}, {"username": 1, "password": 1, "preferences": 1})
     if user and bcrypt.checkpw(password.encode("utf-8"), user["password"]):  # ✅ Fix bcrypt check
         return {
             "username": user["username"],
@@ -44,129 +185,409 @@ def login_user(username, password):
         }
     return None
 
+@_identity_mapped
 def get_user_data(username):
-    user = users_collection.find_one({"username": username})
+    user = _collection("users").find_one({"username": username}, {"preferences": 1})
     return {"preferences": user.get("preferences", [])} if user else {}
 
 # 🟢 Watched & Liked Content Functions
-def add_watched_content(username, media_type, item_id, title):
+# Histories live in user_items, one document per (username, list, type, id),
+# so user documents stay small and lists can be read a page at a time.
+# metadata is tmdb.content_metadata(...) (poster_path, genre_ids, genres,
+# vote_average, release_year) so history pages can render without calling TMDB again
+def add_watched_content(username, media_type, item_id, title, metadata=None):
+    return _add_user_item(username, "watched", media_type, item_id, title, metadata)
+
+def add_liked_content(username, media_type, item_id, title, metadata=None):
+    return _add_user_item(username, "liked", media_type, item_id, title, metadata)
+
+@_invalidates
+def _add_user_item(username, list_name, media_type, item_id, title, metadata=None):
     if not username:
         return False  # Avoid updating without a valid user
     
-    users_collection.update_one(
-        {"username": username},
-        {"$addToSet": {"watched": {
-            "id": item_id,
-            "type": media_type,
-            "title": title,
-            "added_at": datetime.utcnow().isoformat()  # Use UTC for consistency
-        }}}
+    entry = {
+        "title": title,
+        "added_at": datetime.utcnow()  # Use UTC for consistency
+    }
+    entry.update(metadata or {})
+    result = _collection("user_items").update_one(
+        {"username": username, "list": list_name, "type": media_type, "id": item_id},
+        {
+            "$set": entry,  # Re-adding an item moves it back to the top of the list
+            "$setOnInsert": {"taste_at": entry["added_at"]}  # When its taste weight was added
+        },
+        upsert=True
     )
+    
+    # Only a newly added item contributes to the taste profile
+    taste = {}
+    if result.upserted_id is not None:
+        taste = _taste_increments(_item_genres(media_type, item_id, metadata), TASTE_WEIGHTS[list_name])
+    _bump_content_version(username, taste)
+    _record_activity(username, list_name, {"type": media_type, "id": item_id, **entry})
     return True
 
-def add_liked_content(username, media_type, item_id, title):
+@_invalidates
+def import_user_items(username, list_name, entries):
+    """Bulk upsert one chunk of imported entries; returns how many were new to the list"""
+    # entries are dicts with type, id, title, added_at and content metadata. Imports
+    # skip the activity feed: a backlog of old watches isn't news for friends
+    latest = {}
+    for entry in sorted(entries, key=lambda entry: entry["added_at"]):
+        latest[(entry["type"], entry["id"])] = entry  # Rewatches collapse, newest date wins
+    entries = list(latest.values())
+    if not username or not entries:
+        return 0
+    
+    operations = [
+        UpdateOne(
+            {"username": username, "list": list_name, "type": entry["type"], "id": entry["id"]},
+            {
+                "$max": {"added_at": entry["added_at"]},
+                "$set": {k: v for k, v in entry.items() if k not in ("type", "id", "added_at")},
+                "$setOnInsert": {"taste_at": entry["added_at"]}
+            },
+            upsert=True
+        )
+        for entry in entries
+    ]
+    try:
+        upserted = _collection("user_items").bulk_write(operations, ordered=False).upserted_ids
+    except BulkWriteError as e:
+        # A concurrent add of the same title wins the upsert race; the rest still landed
+        upserted = {op["index"]: op["_id"] for op in e.details.get("upserted", [])}
+    
+    # New entries count towards the taste profile as of when they were watched
+    taste = {}
+    for index in upserted:
+        entry = entries[index]
+        at = _epoch_seconds(entry["added_at"])
+        for field, value in _taste_increments(entry.get("genres", []), TASTE_WEIGHTS[list_name], at=at).items():
+            taste[field] = taste.get(field, 0) + value
+    _bump_content_version(username, taste)
+    return len(upserted)
+
+@_identity_mapped
+def get_user_items(username, list_name, after=None, limit=24):
+    """Return (items, next_cursor) for one newest-first page; limit=None reads the whole list"""
+    # Pass next_cursor back as after to continue; it is None on the last page
+    query = {"username": username, "list": list_name}
+    if after:
+        added_at, last_id = after
+        query["$or"] = [
+            {"added_at": {"$lt": added_at}},
+            {"added_at": added_at, "_id": {"$lt": last_id}}
+        ]
+    cursor = _collection("user_items").find(query, {"username": 0, "list": 0}).sort(
+        [("added_at", DESCENDING), ("_id", DESCENDING)]
+    )
+    if limit is None:
+        return list(cursor), None
+    
+    items = list(cursor.limit(limit + 1))  # One extra row tells us whether another page exists
+    if len(items) > limit:
+        items = items[:limit]
+        return items, (items[-1]["added_at"], items[-1]["_id"])
+    return items, None
+
+def iter_user_items(username, list_name, batch_size=500):
+    """Stream a whole list, newest first, without materializing it"""
+    return _collection("user_items").find(
+        {"username": username, "list": list_name}, {"username": 0, "list": 0}
+    ).sort([("added_at", DESCENDING), ("_id", DESCENDING)]).batch_size(batch_size)
+
+@_identity_mapped
+def get_user_item_keys(username, list_name):
+    """Set of (type, id) pairs in a list, reading only those two fields"""
+    cursor = _collection("user_items").find(
+        {"username": username, "list": list_name}, {"_id": 0, "type": 1, "id": 1}
+    )
+    return {(item["type"], item["id"]) for item in cursor}
+
+@_invalidates
+def remove_content(username, content_type, media_type, item_id):
     if not username:
         return False
     
-    users_collection.update_one(
-        {"username": username},
-        {"$addToSet": {"liked": {
-            "id": item_id,
-            "type": media_type,
-            "title": title,
-            "added_at": datetime.utcnow().isoformat()
-        }}}
+    # The deleted document carries the genres to take back out of the taste profile
+    entry = _collection("user_items").find_one_and_delete(
+        {"username": username, "list": content_type, "type": media_type, "id": item_id}
     )
+    if not entry:
+        return False
+    # A removed title also leaves friends' feeds
+    _collection("activity").delete_many(
+        {"actor": username, "verb": content_type, "type": media_type, "id": item_id}
+    )
+    
+    # Take back exactly what was added: the weight scaled to when it was added, not to now
+    genres = _item_genres(media_type, item_id, entry)
+    at = _epoch_seconds(entry.get("taste_at") or entry["added_at"])
+    _bump_content_version(username, _taste_increments(genres, -TASTE_WEIGHTS[content_type], at=at))
     return True
 
-def get_user_content(username):
-    user = users_collection.find_one({"username": username})
-    return {
-        "watched": user.get("watched", []),  # ✅ Ensure empty list if no data
-        "liked": user.get("liked", [])
-    } if user else {"watched": [], "liked": []}
+# 🟢 Friend Activity Feed
+# One document per watch/like, stored once under its actor and read with $in
+# over the reader's friends via the (actor, verb, created_at) index
+def _record_activity(actor, verb, entry):
+    _collection("activity").insert_one({
+        "actor": actor,
+        "verb": verb,
+        "type": entry["type"],
+        "id": entry["id"],
+        "title": entry["title"],
+        "poster_path": entry.get("poster_path"),
+        "created_at": datetime.utcnow()
+    })
 
-def remove_content(username, content_type, item_id):
-    if not username:
+@_identity_mapped
+def get_friends_activity(username, verb="watched", limit=8):
+    friends = get_friends(username)
+    if not friends:
+        return []
+    cursor = _collection("activity").find(
+        {"actor": {"$in": friends}, "verb": verb},
+        {"_id": 0, "actor": 1, "type": 1, "id": 1, "title": 1, "poster_path": 1, "created_at": 1}
+    ).sort("created_at", DESCENDING).limit(limit)
+    return [
+        {
+            "type": activity["type"],
+            "id": activity["id"],
+            "title": activity["title"],
+            "poster_path": activity.get("poster_path"),
+            "added_at": activity["created_at"],
+            "friend_username": activity["actor"]
+        }
+        for activity in cursor
+    ]
+
+@_identity_mapped
+def get_popular_with_friends(username, limit=8):
+    """Titles watched by the most friends, counted server-side in one aggregation"""
+    friends = get_friends(username)
+    if not friends:
+        return []
+    return list(_collection("user_items").aggregate([
+        {"$match": {"username": {"$in": friends}, "list": "watched"}},
+        {"$group": {
+            "_id": {"type": "$type", "id": "$id"},
+            "title": {"$first": "$title"},
+            "poster_path": {"$max": "$poster_path"},
+            "watch_count": {"$sum": 1},
+            "friends": {"$addToSet": "$username"}
+        }},
+        {"$sort": {"watch_count": DESCENDING}},
+        {"$limit": limit},
+        {"$project": {
+            "_id": 0,
+            "type": "$_id.type",
+            "id": "$_id.id",
+            "title": 1,
+            "poster_path": 1,
+            "watch_count": 1,
+            "friends": 1
+        }}
+    ]))
+
+# Bumped by every write that changes what Explore would recommend, so pages
+# can cache derived data per user and recompute only when it moves
+@_identity_mapped
+def get_content_version(username):
+    user = _collection("users").find_one({"username": username}, {"content_version": 1})
+    return user.get("content_version", 0) if user else 0
+
+@_invalidates
+def _bump_content_version(username, taste=None):
+    _collection("users").update_one(
+        {"username": username},
+        {"$inc": {"content_version": 1, **(taste or {})}}
+    )
+
+# 🟢 Taste Profile Functions
+def _epoch_seconds(value):
+    """Unix time of a naive UTC datetime (how added_at/created_at are stored)"""
+    return (value - datetime(1970, 1, 1)).total_seconds()
+
+def _taste_scale(at=None):
+    decay = math.log(2) / (TASTE_HALF_LIFE_DAYS * 86400)
+    return math.exp(decay * ((at or time.time()) - TASTE_EPOCH))
+
+def _taste_increments(genres, weight, prefix="taste.", at=None):
+    """$inc document adding weight (scaled to now, or to `at`) to each genre of the taste vector"""
+    scaled = weight * _taste_scale(at)
+    return {f"{prefix}{genre.replace('.', '_')}": scaled for genre in genres}
+
+def _item_genres(media_type, item_id, metadata=None):
+    """Genre names from the caller's metadata, else from the shared item catalog"""
+    if metadata and metadata.get("genres"):
+        return metadata["genres"]
+    item = _collection("items").find_one({"_id": item_key(media_type, item_id)}, {"genres": 1})
+    return item.get("genres", []) if item else []
+
+@_identity_mapped
+def get_taste_profile(username):
+    """Return {genre: weight} decayed to the current time (only positive weights)"""
+    user = _collection("users").find_one({"username": username}, {"taste": 1, "taste_initialized": 1})
+    if user and not user.get("taste_initialized") and initialize_taste_profile(username):
+        user = _collection("users").find_one({"username": username}, {"taste": 1})
+    scale = _taste_scale()
+    taste = user.get("taste", {}) if user else {}
+    return {genre: value / scale for genre, value in taste.items() if value > 0}
+
+@_invalidates
+def initialize_taste_profile(username):
+    """Rebuild the taste vector once from a user's whole history; returns True if it was written"""
+    # For users created before taste profiles existed, whose vector only holds what
+    # was added since. The rebuild is skipped (and retried on a later read) if a write
+    # bumps content_version meanwhile, so no concurrent $inc is overwritten
+    users = _collection("users")
+    user = users.find_one({"username": username}, {"preferences": 1, "content_version": 1, "taste_initialized": 1})
+    if not user or user.get("taste_initialized"):
         return False
     
-    update_result = users_collection.update_one(
-        {"username": username},
-        {"$pull": {content_type: {"id": item_id}}}
+    items = list(_collection("user_items").find(
+        {"username": username, "list": {"$in": list(CONTENT_LISTS)}},
+        {"list": 1, "type": 1, "id": 1, "genres": 1, "added_at": 1, "taste_at": 1}
+    ))
+    recommendations = list(_collection("recommendations").find(
+        {"to_user": username, "status": "active"}, {"media_type": 1, "item_id": 1, "created_at": 1}
+    ))
+    catalog = get_items(
+        [(item["type"], item["id"]) for item in items if not item.get("genres")] +
+        [(rec["media_type"], rec["item_id"]) for rec in recommendations]
+    )
+    
+    def catalog_genres(media_type, item_id):
+        item = catalog.get(item_key(media_type, item_id))
+        return item.get("genres", []) if item else []
+    
+    taste = {}
+    def add(genres, weight, at=None):
+        for field, value in _taste_increments(genres, weight, prefix="", at=at).items():
+            taste[field] = taste.get(field, 0) + value
+    
+    preferences = user.get("preferences", [])
+    add([name for pref in preferences for name in PREFERENCE_GENRES.get(pref, [pref])], TASTE_WEIGHTS["preferences"])
+    for item in items:
+        genres = item.get("genres") or catalog_genres(item["type"], item["id"])
+        add(genres, TASTE_WEIGHTS[item["list"]], at=_epoch_seconds(item.get("taste_at") or item["added_at"]))
+    for rec in recommendations:
+        add(catalog_genres(rec["media_type"], rec["item_id"]), TASTE_WEIGHTS["recommendations"],
+            at=_epoch_seconds(rec["created_at"]))
+    
+    result = users.update_one(
+        {"username": username, "taste_initialized": {"$ne": True}, "content_version": user.get("content_version")},
+        {"$set": {"taste": taste, "taste_initialized": True}}
     )
-    return update_result.modified_count > 0
+    return result.modified_count == 1
 
 # 🟢 Friend System Functions
+@_invalidates
 def send_friend_request(from_user, to_user):
     if from_user == to_user:
         return False
     
-    existing_request = friend_requests_collection.find_one({
-        "from_user": from_user,
-        "to_user": to_user,
-        "status": "pending"
-    })
-
-    if existing_request:
-        return False  # Request already exists
-
-    friend_requests_collection.insert_one({
-        "from_user": from_user,
-        "to_user": to_user,
-        "status": "pending",
-        "created_at": datetime.utcnow()
-    })
-    return True
+    # Upsert against the unique pending index: concurrent clicks can't create duplicates
+    try:
+        result = _collection("friend_requests").update_one(
+            {"from_user": from_user, "to_user": to_user, "status": "pending"},
+            {"$setOnInsert": {"created_at": datetime.utcnow()}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        return False  # A concurrent click inserted the same request first
+    return result.upserted_id is not None  # False if the request already existed
 
+@_identity_mapped
 def get_friend_requests(username):
-    return list(friend_requests_collection.find({
+    return list(_collection("friend_requests").find({
         "$or": [
             {"to_user": username, "status": "pending"},
             {"from_user": username, "status": "pending"}
         ]
     }))
 
+_transactions_supported = None
+_write_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="db-write")
+
+def _supports_transactions():
+    """Multi-document transactions need a replica set or a sharded cluster"""
+    global _transactions_supported
+    if _transactions_supported is None:
+        hello = get_client().admin.command("hello")
+        _transactions_supported = "setName" in hello or hello.get("msg") == "isdbgrid"
+    return _transactions_supported
+
+@_invalidates
 def respond_friend_request(request_id, action):
-    try:
-        request = friend_requests_collection.find_one({"_id": ObjectId(request_id)})  # ✅ Fix ObjectId issue
+    status = "accepted" if action == "accept" else "rejected"
+    
+    def respond(session=None):
+        now = datetime.utcnow()
+        # Claiming the pending request and setting its status is one atomic step,
+        # so a double click can never accept the same request twice
+        request = _collection("friend_requests").find_one_and_update(
+            {"_id": ObjectId(request_id), "status": "pending"},  # ✅ Fix ObjectId issue
+            {"$set": {"status": status, "responded_at": now}},
+            session=session
+        )
         if not request:
             return False
-
+        
         if action == "accept":
-            # Add to friends collection
-            friends_collection.insert_one({
-                "user1": request["from_user"],
-                "user2": request["to_user"],
-                "since": datetime.utcnow()
-            })
-
-            # Update both users' friends lists
-            users_collection.update_one(
-                {"username": request["from_user"]},
-                {"$addToSet": {"friends": request["to_user"]}}
-            )
-            users_collection.update_one(
-                {"username": request["to_user"]},
-                {"$addToSet": {"friends": request["from_user"]}}
-            )
-
-        # Update request status
-        friend_requests_collection.update_one(
-            {"_id": ObjectId(request_id)},
-            {"$set": {"status": "accepted" if action == "accept" else "rejected"}}
-        )
+            # Both users' friends lists in one bulk_write, plus the friendship ledger
+            def add_friends():
+                _collection("users").bulk_write([
+                    UpdateOne({"username": request["from_user"]}, {"$addToSet": {"friends": request["to_user"]}}),
+                    UpdateOne({"username": request["to_user"]}, {"$addToSet": {"friends": request["from_user"]}})
+                ], ordered=False, session=session)
+            
+            def add_ledger():
+                _collection("friends").update_one(
+                    {"user1": request["from_user"], "user2": request["to_user"]},
+                    {"$setOnInsert": {"since": now}},
+                    upsert=True,
+                    session=session
+                )
+            
+            if session is None:
+                # Outside a transaction both writes are idempotent, so send them side by
+                # side: accepting costs two round trips (claim, then both writes)
+                try:
+                    ledger = _write_executor.submit(add_ledger)
+                    add_friends()
+                    ledger.result()
+                except Exception:
+                    # Release the claim so accepting can be retried and finish the writes
+                    _collection("friend_requests").update_one(
+                        {"_id": request["_id"], "status": status},
+                        {"$set": {"status": "pending"}, "$unset": {"responded_at": ""}}
+                    )
+                    raise
+            else:
+                add_friends()  # A session serves one operation at a time
+                add_ledger()
         return True
+    
+    try:
+        if _supports_transactions():
+            with get_client().start_session() as session:
+                return session.with_transaction(respond)
+        return respond()
     except Exception as e:
         print("Error:", e)
         return False
 
+@_identity_mapped
 def get_friends(username):
-    user = users_collection.find_one({"username": username})
+    user = _collection("users").find_one({"username": username}, {"friends": 1})
     return user.get("friends", []) if user else []
 
 # 🟢 Recommendation System Functions
+@_invalidates
 def add_recommendation(from_user, to_user, media_type, item_id, title, note=""):
-    recommendations_collection.insert_one({
+    _collection("recommendations").insert_one({
         "from_user": from_user,
         "to_user": to_user,
         "media_type": media_type,
@@ -176,21 +597,68 @@ def add_recommendation(from_user, to_user, media_type, item_id, title, note=""):
         "created_at": datetime.utcnow(),
         "status": "active"
     })
+    genres = _item_genres(media_type, item_id)
+    _bump_content_version(to_user, _taste_increments(genres, TASTE_WEIGHTS["recommendations"]))
     return True
 
+@_identity_mapped
 def get_recommendations(username):
-    return list(recommendations_collection.find({
+    return list(_collection("recommendations").find({
         "to_user": username,
         "status": "active"
-    }))
+    }).sort("created_at", ASCENDING))
+
+def iter_recommendations(username, batch_size=500):
+    """Stream a user's active recommendations, oldest first, without materializing them"""
+    return _collection("recommendations").find(
+        {"to_user": username, "status": "active"}, {"to_user": 0, "status": 0}
+    ).sort("created_at", ASCENDING).batch_size(batch_size)
 
+@_invalidates
 def remove_recommendation(recommendation_id):
     try:
-        result = recommendations_collection.update_one(
-            {"_id": ObjectId(recommendation_id)},  # ✅ Fix ObjectId issue
-            {"$set": {"status": "removed"}}
+        recommendation = _collection("recommendations").find_one_and_update(
+            {"_id": ObjectId(recommendation_id), "status": {"$ne": "removed"}},  # ✅ Fix ObjectId issue
+            {"$set": {"status": "removed"}},
+            projection={"to_user": 1, "media_type": 1, "item_id": 1, "created_at": 1}
         )
-        return result.modified_count > 0
+        if not recommendation:
+            return False
+        genres = _item_genres(recommendation["media_type"], recommendation["item_id"])
+        at = _epoch_seconds(recommendation["created_at"])
+        _bump_content_version(
+            recommendation["to_user"],
+            _taste_increments(genres, -TASTE_WEIGHTS["recommendations"], at=at)
+        )
+        return True
     except Exception as e:
         print("Error:", e)
         return False
+
+
+# 🟢 Item Catalog Functions
+def item_key(media_type, tmdb_id):
+    return f"{media_type}:{tmdb_id}"
+
+def get_items(keys):
+    """Fetch catalog documents for (media_type, tmdb_id) pairs with a single $in query"""
+    ids = [item_key(media_type, tmdb_id) for media_type, tmdb_id in keys]
+    if not ids:
+        return {}
+    return {item["_id"]: item for item in _collection("items").find({"_id": {"$in": ids}})}
+
+def upsert_items(items):
+    if not items:
+        return
+    _collection("items").bulk_write(
+        [ReplaceOne({"_id": item["_id"]}, item, upsert=True) for item in items],
+        ordered=False
+    )
+
+def iter_catalog_titles(batch_size=2000, since=None):
+    """Stream the fields search needs from every catalog item (optionally only those refreshed after since)"""
+    query = {"refreshed_at": {"$gt": since}} if since else {}
+    return _collection("items").find(query, {
+        "media_type": 1, "tmdb_id": 1, "title": 1, "original_title": 1, "overview": 1, "poster_path": 1,
+        "genre_ids": 1, "vote_average": 1, "popularity": 1, "release_date": 1
+    }).batch_size(batch_size)
@@ -0,0 +1,153 @@
+import os
+import time
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+import metrics
+from tmdb_cache import CACHE_DIR
+
+# Emotion Model Configuration
+MODEL_NAME = os.getenv("EMOTION_MODEL", "seara/rubert-tiny2-ru-go-emotions")
+BACKEND = os.getenv("EMOTION_BACKEND", "auto")  # auto, onnx, quantized or torch
+BACKENDS = ("onnx", "quantized", "torch")  # Order tried by "auto"
+MAX_BATCH = 32
+MAX_WAIT = 0.01  # Seconds the batcher waits for more requests to join a batch
+CACHE_SIZE = 4096
+REQUEST_TIMEOUT = 30
+ONNX_DIR = os.getenv("EMOTION_ONNX_DIR", os.path.join(CACHE_DIR, "emotion_onnx", MODEL_NAME.replace("/", "--")))
+
+_model = None
+_model_lock = threading.Lock()
+
+# 🟢 Backends
+# Each loader returns a transformers text-classification pipeline on CPU
+def _load_torch():
+    from transformers import pipeline
+    return pipeline("text-classification", model=MODEL_NAME, device=-1)
+
+def _load_quantized():
+    """Dynamically quantize the Linear layers to int8 (smaller, faster on CPU)"""
+    import torch
+    from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
+    model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
+    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    return pipeline("text-classification", model=model, tokenizer=tokenizer, device=-1)
+
+def _load_onnx():
+    """ONNX Runtime via optimum (optional dependency: optimum[onnxruntime])"""
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+    from transformers import pipeline, AutoTokenizer
+    # Exporting takes far longer than loading, so it happens once and is kept in ONNX_DIR
+    if os.path.isdir(ONNX_DIR):
+        model = ORTModelForSequenceClassification.from_pretrained(ONNX_DIR)
+        tokenizer = AutoTokenizer.from_pretrained(ONNX_DIR)
+    else:
+        model = ORTModelForSequenceClassification.from_pretrained(MODEL_NAME, export=True)
+        tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+        model.save_pretrained(ONNX_DIR)
+        tokenizer.save_pretrained(ONNX_DIR)
+    return pipeline("text-classification", model=model, tokenizer=tokenizer)
+
+LOADERS = {"onnx": _load_onnx, "quantized": _load_quantized, "torch": _load_torch}
+
+def load_classifier(backend="auto"):
+    """Return (backend, pipeline), falling back down BACKENDS when a backend can't load"""
+    candidates = BACKENDS if backend == "auto" else (backend,) + tuple(b for b in BACKENDS if b != backend)
+    for candidate in candidates:
+        try:
+            return candidate, LOADERS[candidate]()
+        except Exception as e:
+            print("Emotion backend unavailable:", candidate, e)
+    raise RuntimeError("No emotion model backend could be loaded")
+
+def normalize(text):
+    """Cache key and model input: collapsed whitespace, case kept (the model is case-sensitive)"""
+    return " ".join(text.split())
+
+# 🟢 Micro-Batching Server
+class EmotionModel:
+    """A loaded classifier served by one batching thread, with an LRU of text → label"""
+
+    def __init__(self, backend=BACKEND, max_batch=MAX_BATCH, max_wait=MAX_WAIT, cache_size=CACHE_SIZE):
+        started = time.perf_counter()
+        self.backend, self._classifier = load_classifier(backend)
+        self.load_seconds = time.perf_counter() - started
+        metrics.set_gauge("emotion.load_seconds", self.load_seconds)
+
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._queue = queue.Queue()
+        threading.Thread(target=self._serve, name="emotion-batcher", daemon=True).start()
+
+    def classify(self, text, timeout=REQUEST_TIMEOUT):
+        """Return the lower-cased emotion label for text"""
+        key = normalize(text)
+        if not key:
+            return "neutral"
+        started = time.perf_counter()
+
+        with self._cache_lock:
+            label = self._cache.get(key)
+            if label is not None:
+                self._cache.move_to_end(key)
+        if label is not None:
+            metrics.incr("emotion.cache_hits")
+        else:
+            metrics.incr("emotion.cache_misses")
+            future = Future()
+            self._queue.put((key, future))
+            label = future.result(timeout)
+
+        metrics.observe("emotion.latency_ms", (time.perf_counter() - started) * 1000)
+        return label
+
+    def _next_batch(self):
+        """Block for one request, then gather more until the batch fills or max_wait passes"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _serve(self):
+        while True:
+            batch = self._next_batch()
+            texts = list(dict.fromkeys(key for key, _ in batch))  # Same text from many sessions runs once
+            try:
+                with metrics.timed("emotion.batch_ms"):
+                    results = self._classifier(texts, batch_size=len(texts), truncation=True)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            metrics.observe("emotion.batch_size", len(texts))
+
+            labels = {key: result["label"].lower() for key, result in zip(texts, results)}
+            with self._cache_lock:
+                for key, label in labels.items():
+                    self._cache[key] = label
+                    self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            for key, future in batch:
+                future.set_result(labels[key])
+
+def get_model():
+    """Return the process-wide emotion model, loading it on first use"""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = EmotionModel()
+    return _model
@@ -0,0 +1,85 @@
+import io
+import csv
+import json
+from db import iter_user_items, iter_recommendations, get_friends, CONTENT_LISTS
+
+# Exporter Configuration
+BATCH_SIZE = 1000  # Documents per Mongo cursor batch
+SECTIONS = CONTENT_LISTS + ("friends", "recommendations")
+FORMATS = ("ndjson", "csv")
+CSV_FIELDS = [
+    "section", "type", "id", "title", "added_at", "release_year",
+    "vote_average", "genres", "friend", "from_user", "note"
+]
+
+# 🟢 Records
+def iter_records(username, sections=SECTIONS, batch_size=BATCH_SIZE):
+    """Yield one flat record per exported row, reading each section from a cursor"""
+    for section in sections:
+        if section in CONTENT_LISTS:
+            for item in iter_user_items(username, section, batch_size):
+                yield {
+                    "section": section,
+                    "type": item["type"],
+                    "id": item["id"],
+                    "title": item.get("title"),
+                    "added_at": item.get("added_at"),
+                    "release_year": item.get("release_year"),
+                    "vote_average": item.get("vote_average"),
+                    "genres": item.get("genres", [])
+                }
+        elif section == "friends":
+            for friend in get_friends(username):
+                yield {"section": "friends", "friend": friend}
+        elif section == "recommendations":
+            for rec in iter_recommendations(username, batch_size):
+                yield {
+                    "section": "recommendations",
+                    "type": rec["media_type"],
+                    "id": rec["item_id"],
+                    "title": rec.get("title"),
+                    "added_at": rec.get("created_at"),
+                    "from_user": rec.get("from_user"),
+                    "note": rec.get("note", "")
+                }
+
+# 🟢 Serializers
+# Both yield text one record at a time so output can go straight to a file
+def iter_ndjson(records):
+    for record in records:
+        yield json.dumps(record, default=_json_default, ensure_ascii=False) + "\n"
+
+def iter_csv(records):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for record in records:
+        row = dict(record)
+        if "genres" in row:
+            row["genres"] = "|".join(row["genres"])
+        if row.get("added_at"):
+            row["added_at"] = row["added_at"].isoformat()
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()  # Header only, for an empty export
+
+def _json_default(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+def export_history(username, out, fmt="ndjson", sections=SECTIONS, batch_size=BATCH_SIZE):
+    """Write a user's export to a binary file object; returns the number of records"""
+    count = 0
+    def counted(records):
+        nonlocal count
+        for record in records:
+            count += 1
+            yield record
+    
+    serialize = iter_csv if fmt == "csv" else iter_ndjson
+    for chunk in serialize(counted(iter_records(username, sections, batch_size))):
+        out.write(chunk.encode("utf-8"))
+    return count
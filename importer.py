@@ -0,0 +1,200 @@
+import io
+import re
+import csv
+import json
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from db import import_user_items
+from tmdb import tmdb_get, search, content_metadata, rate_budget
+from tmdb_limits import TokenBucket
+
+# Importer Configuration
+CHUNK_SIZE = 500  # Rows resolved in parallel and written per bulk_write
+READ_SIZE = 1 << 16  # Characters read at a time from JSON exports
+IMPORT_WORKERS = 4
+IMPORT_RATE = 10  # TMDB requests per second all imports together may use (of the process-wide limit)
+
+# Imports resolve on their own small pool and rate budget, so a large file
+# can't take the page-serving pool or the whole TMDB rate limit from other sessions
+_executor = ThreadPoolExecutor(max_workers=IMPORT_WORKERS, thread_name_prefix="import")
+_budget = TokenBucket(rate=IMPORT_RATE, burst=IMPORT_RATE)
+
+# IMDb "Title Type" values we can map to a TMDB media type (episodes are skipped),
+# keyed case- and space-insensitively: exports use both "tvSeries" and "TV Series"
+IMDB_TITLE_TYPES = {
+    "movie": "movie",
+    "tvmovie": "movie",
+    "short": "movie",
+    "tvshort": "movie",
+    "video": "movie",
+    "tvseries": "tv",
+    "tvminiseries": "tv",
+    "tvspecial": "tv"
+}
+
+# 🟢 Parsing
+# Every format is turned into rows of
+# {media_type, title, year, tmdb_id, imdb_id, added_at}, one at a time;
+# entries that can't be imported (episodes, blank rows) come through as None
+def parse_export(stream):
+    """Detect the export format of a binary stream and return a generator of rows"""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    first_line = text.readline()
+
+    if first_line.lstrip().startswith("["):  # Trakt JSON export
+        chunks = itertools.chain([first_line], iter(lambda: text.read(READ_SIZE), ""))
+        return map(_trakt_row, _iter_json_array(chunks))
+
+    reader = csv.DictReader(itertools.chain([first_line], text))
+    if not reader.fieldnames:
+        raise ValueError("Empty or unrecognized export")
+    if "Const" in reader.fieldnames:
+        return map(_imdb_row, reader)
+    if "Letterboxd URI" in reader.fieldnames or "Name" in reader.fieldnames:
+        return map(_letterboxd_row, reader)
+    raise ValueError("Unrecognized export file: expected a Letterboxd or IMDb CSV, or a Trakt JSON export")
+
+def _iter_json_array(chunks):
+    """Yield the objects of a top-level JSON array without loading the whole document"""
+    decoder = json.JSONDecoder()
+    buffer, eof = "", False
+    while True:
+        buffer = buffer.lstrip(" \t\r\n,[")
+        if buffer.startswith("]"):
+            return
+        if buffer:
+            try:
+                value, end = decoder.raw_decode(buffer)
+            except ValueError:
+                if eof:
+                    raise
+            else:
+                yield value
+                buffer = buffer[end:]
+                continue
+        if eof:
+            return
+        chunk = next(chunks, "")
+        eof = not chunk
+        buffer += chunk
+
+def _parse_date(value):
+    """ISO date/datetime from an export as naive UTC (matching added_at elsewhere)"""
+    try:
+        parsed = datetime.fromisoformat((value or "").strip().replace("Z", "+00:00"))
+    except ValueError:
+        return datetime.utcnow()
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def _letterboxd_row(row):
+    if not row.get("Name"):
+        return None
+    return {
+        "media_type": "movie",  # Letterboxd only tracks films
+        "title": row["Name"],
+        "year": row.get("Year"),
+        "added_at": _parse_date(row.get("Watched Date") or row.get("Date"))
+    }
+
+def _imdb_row(row):
+    title_type = re.sub(r"[\s_-]", "", row.get("Title Type") or "movie").lower()
+    media_type = IMDB_TITLE_TYPES.get(title_type)
+    if not media_type:
+        return None
+    return {
+        "media_type": media_type,
+        "title": row.get("Title"),
+        "year": row.get("Year"),
+        "imdb_id": row["Const"],
+        "added_at": _parse_date(row.get("Date Rated") or row.get("Created"))
+    }
+
+def _trakt_row(entry):
+    if not isinstance(entry, dict):
+        raise ValueError("Unrecognized Trakt export: expected a list of history entries")
+    # History entries for episodes carry the show, which is what we store
+    media_type = "movie" if "movie" in entry else "tv"
+    media = entry.get("movie") or entry.get("show")
+    if not media:
+        return None
+    if not isinstance(media, dict):
+        raise ValueError("Unrecognized Trakt export: expected a list of history entries")
+    ids = media.get("ids", {})
+    return {
+        "media_type": media_type,
+        "title": media.get("title"),
+        "year": media.get("year"),
+        "tmdb_id": ids.get("tmdb"),
+        "imdb_id": ids.get("imdb"),
+        "added_at": _parse_date(
+            entry.get("watched_at") or entry.get("last_watched_at") or entry.get("listed_at") or entry.get("rated_at")
+        )
+    }
+
+# 🟢 Resolution
+def resolve_row(row):
+    """Find the TMDB entry for an export row through the cached client; returns (media_type, item) or None"""
+    media_type = row["media_type"]
+    if row.get("tmdb_id"):
+        item = tmdb_get(f"/{media_type}/{row['tmdb_id']}")
+        if item:
+            return media_type, item
+
+    if row.get("imdb_id"):
+        found = tmdb_get(f"/find/{row['imdb_id']}", {"external_source": "imdb_id"}) or {}
+        for found_type in (media_type, "tv" if media_type == "movie" else "movie"):
+            results = found.get(f"{found_type}_results")
+            if results:
+                return found_type, results[0]
+
+    if not row.get("title"):
+        return None
+    results = []
+    if row.get("year"):
+        year_param = "year" if media_type == "movie" else "first_air_date_year"
+        results = search(row["title"], media_type, {year_param: row["year"]})
+    if not results:
+        results = search(row["title"], media_type)
+    return (media_type, results[0]) if results else None
+
+def _resolve_within_budget(row):
+    with rate_budget(_budget):
+        return resolve_row(row)
+
+# 🟢 Import
+def import_history(username, stream, list_name="watched", chunk_size=CHUNK_SIZE, progress=None):
+    """Stream an export file into a user's list; returns {"read", "imported", "unresolved", "skipped"}"""
+    # Only one chunk of rows is held at a time: it is resolved in parallel, then
+    # written with a single bulk_write. progress(stats) is called after every chunk
+    rows = parse_export(stream)
+    stats = {"read": 0, "imported": 0, "unresolved": 0, "skipped": 0}
+
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            break
+        stats["read"] += len(chunk)
+        stats["skipped"] += chunk.count(None)
+        chunk = [row for row in chunk if row]
+
+        entries = []
+        for row, resolved in zip(chunk, _executor.map(_resolve_within_budget, chunk)):
+            if not resolved:
+                stats["unresolved"] += 1
+                continue
+            media_type, item = resolved
+            entries.append({
+                "type": media_type,
+                "id": item["id"],
+                "title": item.get("title") or item.get("name"),
+                "added_at": row["added_at"],
+                **content_metadata(item, media_type)
+            })
+
+        stats["imported"] += import_user_items(username, list_name, entries)
+        if progress:
+            progress(stats)
+    return stats
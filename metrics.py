@@ -0,0 +1,65 @@
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+# In-process metrics: counters, gauges and latency samples shared by all sessions
+SAMPLE_WINDOW = 1000  # Recent observations kept per metric for percentiles
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_samples = {}
+
+def incr(name, value=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def set_gauge(name, value):
+    with _lock:
+        _gauges[name] = value
+
+def observe(name, value):
+    """Record one sample (e.g. a latency in ms) for name"""
+    with _lock:
+        if name not in _samples:
+            _samples[name] = deque(maxlen=SAMPLE_WINDOW)
+        _samples[name].append(value)
+
+@contextmanager
+def timed(name):
+    """Observe the wall time of the with-block in milliseconds"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, (time.perf_counter() - started) * 1000)
+
+def _summary(samples):
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": pick(0.50),
+        "p95": pick(0.95),
+        "max": ordered[-1]
+    }
+
+def snapshot():
+    """Return {"counters", "gauges", "timings"} with percentiles over the recent window"""
+    with _lock:
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+        samples = {name: list(values) for name, values in _samples.items() if values}
+    return {
+        "counters": counters,
+        "gauges": gauges,
+        "timings": {name: _summary(values) for name, values in samples.items()}
+    }
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _samples.clear()
@@ -1,21 +1,18 @@
 import streamlit as st
-import requests
-import os
-from dotenv import load_dotenv
-from transformers import pipeline
+from emotion_model import get_model
+from tmdb import TMDB_API_KEY, TMDB_IMAGE_BASE_URL
+from db import get_user_item_keys, begin_request
+import snapshots
+import candidate_pools
+
+# Start a fresh db identity map for this script run
+begin_request()
 #testing
-# Load API Key from .env
-load_dotenv()
-API_KEY = os.getenv("TMDB_API_KEY")
 
-if not API_KEY:
+if not TMDB_API_KEY:
     st.error("API Key not found! Make sure to set it in the .env file.")
     st.stop()
 
-# TMDB URLs
-TMDB_GENRES_LIST_URL = "https://api.themoviedb.org/3/genre/movie/list"
-TMDB_MOVIES_URL = "https://api.themoviedb.org/3/discover/movie"
-
 # Mood-to-Genre Mapping
 MOOD_TO_GENRE = {
     "joy": ["Documentary", "History"],    
@@ -27,26 +24,23 @@ MOOD_TO_GENRE = {
 }
 
 
-# Fetch TMDB Genre Mapping
-@st.cache_data
+# TMDB Genre Mapping from the background-refreshed genre list
 def fetch_genre_mapping():
-    response = requests.get(TMDB_GENRES_LIST_URL, params={"api_key": API_KEY})
-    if response.status_code == 200:
-        genres = response.json().get("genres", [])
-        return {genre["name"]: genre["id"] for genre in genres}
-    return {}
+    return {genre["name"]: genre["id"] for genre in snapshots.get("genres/movie")}
 
 GENRE_MAPPING = fetch_genre_mapping()
 
-# Fetch Movies by Genre
+# Sample Movies by Genre from the shared pools, skipping already watched titles
 def fetch_movies_by_genre(genre_ids):
-    url = TMDB_MOVIES_URL
-    params = {"api_key": API_KEY, "with_genres": ",".join(map(str, genre_ids))}
-    response = requests.get(url, params=params)
-    return response.json().get("results", []) if response.status_code == 200 else []
+    watched = get_user_item_keys(st.session_state.username, "watched") if st.session_state.get("logged_in") else set()
+    return candidate_pools.sample("movie", genre_ids, exclude=watched, limit=15)
+
+# Load Sentiment Model once per process; reruns reuse the warm, batched classifier
+@st.cache_resource(show_spinner="Loading emotion model...")
+def load_emotion_model():
+    return get_model()
 
-# Load Sentiment Model
-emotion_classifier = pipeline("text-classification", model="seara/rubert-tiny2-ru-go-emotions")
+emotion_classifier = load_emotion_model()
 
 # Streamlit UI
 st.title("🎬 AI Movie Recommendation Chatbot")
@@ -55,7 +49,7 @@ user_input = st.text_input("How are you feeling today?")
 
 if user_input:
     # Detect emotion
-    detected_emotion = emotion_classifier(user_input)[0]["label"].lower()
+    detected_emotion = emotion_classifier.classify(user_input)
     st.write(f"**Detected Emotion:** {detected_emotion.capitalize()}")
 
     # Get movie genres for detected mood
@@ -73,7 +67,7 @@ if user_input:
                 title = movie.get("title", "Unknown")
                 poster_path = movie.get("poster_path", "")
                 movie_id = movie.get("id")
-                poster_url = f"https://image.tmdb.org/t/p/w500{poster_path}" if poster_path else "https://via.placeholder.com/180x270"
+                poster_url = f"{TMDB_IMAGE_BASE_URL}{poster_path}" if poster_path else "https://via.placeholder.com/180x270"
                 
                 with cols[idx % 5]:
                     st.image(poster_url, width=150)
@@ -1,22 +1,23 @@
 import streamlit as st
-import requests
-import os
 from db import (
-    get_user_content, 
+    get_user_items, 
     send_friend_request, 
     get_friend_requests,
     respond_friend_request,
     get_friends,
     get_recommendations,
-    remove_recommendation
+    remove_recommendation,
+    begin_request
 )
+from tmdb import TMDB_IMAGE_BASE_URL
+from catalog import fetch_posters
+import prefetch
 
 # Set page config
 st.set_page_config(page_title="Dashboard", layout="wide")
 
-# TMDB API Configuration
-API_KEY = os.getenv("TMDB_API_KEY")
-TMDB_IMAGE_BASE_URL = "https://image.tmdb.org/t/p/w500"
+# Start a fresh db identity map for this script run
+begin_request()
 
 # CSS Styling
 st.markdown("""
@@ -63,14 +64,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def fetch_poster(media_type, item_id):
-    API_KEY = os.getenv("TMDB_API_KEY")
-    url = f"https://api.themoviedb.org/3/{media_type}/{item_id}"
-    response = requests.get(url, params={"api_key": API_KEY})
-    if response.status_code == 200:
-        return response.json().get("poster_path")
-    return None
-
 # Authentication Check
 if "logged_in" not in st.session_state or not st.session_state["logged_in"]:
     st.warning("Please log in to access the dashboard")
@@ -164,6 +157,8 @@ st.markdown("---")
 st.markdown("## 📚 Your Collections")
 if st.button("View All Collections →", key="view_all_collections"):
     st.switch_page("pages/history.py")
+if st.button("Import from Letterboxd, IMDb or Trakt →", key="import_history"):
+    st.switch_page("pages/import_history.py")
 
 
 st.markdown("---")
@@ -182,10 +177,12 @@ recommendations = get_recommendations(username)
 if recommendations:
     # Reverse to show most recent first
     recommendations.reverse()
+    posters = fetch_posters([(rec["media_type"], rec["item_id"]) for rec in recommendations[:4]])
+    prefetch.enqueue([(rec["media_type"], rec["item_id"]) for rec in recommendations[:4]])
     cols = st.columns(4)
     for idx, rec in enumerate(recommendations[:4]):
         with cols[idx % 4]:
-            poster_path = fetch_poster(rec["media_type"], rec["item_id"])
+            poster_path = posters[(rec["media_type"], rec["item_id"])]
             details_url = f"/details?media_type={rec['media_type']}&id={rec['item_id']}"
             
             if poster_path:
@@ -222,15 +219,16 @@ else:
 # Watched Content Section with clickable posters
 st.markdown("---")
 st.markdown("## 🎬 Your Watched Content")
-watched_content = get_user_content(username).get("watched", [])
-
-watched_content.reverse()
+# Only the 4 newest entries are read; the cursor tells us whether there are more
+watched_content, more_watched = get_user_items(username, "watched", limit=4)
 
 if watched_content:
+    posters = fetch_posters([(item["type"], item["id"]) for item in watched_content[:4] if "poster_path" not in item])
+    prefetch.enqueue([(item["type"], item["id"]) for item in watched_content[:4]])
     cols = st.columns(4)
     for idx, item in enumerate(watched_content[:4]):
         with cols[idx % 4]:
-            poster_path = fetch_poster(item["type"], item["id"])
+            poster_path = item.get("poster_path") or posters.get((item["type"], item["id"]))
             details_url = f"/details?media_type={item['type']}&id={item['id']}"
             
             if poster_path:
@@ -252,7 +250,7 @@ if watched_content:
                     unsafe_allow_html=True
                 )
             st.caption(item["title"])
-    if len(watched_content) > 4:
+    if more_watched:
         if st.button("View All Watched →", key="view_all_watched"):
             st.session_state.list_content_type = "watched"
             st.switch_page("pages/list_content.py")
@@ -263,15 +261,15 @@ else:
 st.markdown("---")
 st.markdown("## ❤️ Your Liked Content")
 
-liked_content = get_user_content(username).get("liked", [])
-
-liked_content.reverse()
+liked_content, more_liked = get_user_items(username, "liked", limit=4)
 
 if liked_content:
+    posters = fetch_posters([(item["type"], item["id"]) for item in liked_content[:4] if "poster_path" not in item])
+    prefetch.enqueue([(item["type"], item["id"]) for item in liked_content[:4]])
     cols = st.columns(4)
     for idx, item in enumerate(liked_content[:4]):
         with cols[idx % 4]:
-            poster_path = fetch_poster(item["type"], item["id"])
+            poster_path = item.get("poster_path") or posters.get((item["type"], item["id"]))
             details_url = f"/details?media_type={item['type']}&id={item['id']}"
             
             if poster_path:
@@ -293,7 +291,7 @@ if liked_content:
                     unsafe_allow_html=True
                 )
             st.caption(item["title"])
-    if len(liked_content) > 4:
+    if more_liked:
         if st.button("View All Liked →", key="view_all_liked"):
             st.session_state.list_content_type = "liked"
             st.switch_page("pages/list_content.py")
@@ -1,7 +1,11 @@
 import streamlit as st
-import requests
-import os
-from db import add_watched_content, add_liked_content
+from db import add_watched_content, add_liked_content, begin_request
+from catalog import get_item
+import prefetch
+from tmdb import show_degraded_banner
+
+# Start a fresh db identity map for this script run
+begin_request()
 
 # Initialize session state if not exists
 if 'logged_in' not in st.session_state:
@@ -11,22 +15,6 @@ if 'logged_in' not in st.session_state:
         'preferences': []
     })
 
-API_KEY = os.getenv("TMDB_API_KEY")
-
-def fetch_details(media_type, item_id):
-    base_url = f"https://api.themoviedb.org/3/{media_type}/{item_id}"
-    params = {"api_key": API_KEY}
-    
-    details = requests.get(base_url, params=params).json()
-    providers = requests.get(f"{base_url}/watch/providers", params=params).json()
-    
-    return details, providers.get("results", {})
-
-def get_external_ids(media_type, item_id):
-    url = f"https://api.themoviedb.org/3/{media_type}/{item_id}/external_ids"
-    response = requests.get(url, params={"api_key": API_KEY})
-    return response.json() if response.status_code == 200 else {}
-
 # Get parameters
 media_type = st.query_params.get("media_type")
 item_id = st.query_params.get("id")
@@ -35,11 +23,19 @@ if not media_type or not item_id:
     st.error("Missing parameters!")
     st.stop()
 
-details, providers = fetch_details(media_type, item_id)
-external_ids = get_external_ids(media_type, item_id)
+prefetch.record_view(media_type, item_id)
+details = get_item(media_type, item_id)
+if not details:
+    st.error("Could not load details for this title.")
+    st.stop()
+
+providers = details["providers"]
+external_ids = details["external_ids"]
 
 # Display Details
-st.title(details.get("title") or details.get("name"))
+st.title(details["title"])
+
+show_degraded_banner()
 st.image(f"https://image.tmdb.org/t/p/w500{details.get('poster_path')}", 
         use_container_width=True)
 
@@ -49,10 +45,24 @@ st.write(details.get("overview", "No description available."))
 if media_type == "movie":
     st.markdown(f"**Release Date:** 📅 {details.get('release_date')}")
 else:
-    st.markdown(f"**First Air Date:** 📅 {details.get('first_air_date')}")
+    st.markdown(f"**First Air Date:** 📅 {details.get('release_date')}")
 
 st.markdown(f"**Rating:** ⭐ {details.get('vote_average', 'N/A')}/10")
 
+if details.get("directors"):
+    label = "Director" if media_type == "movie" else "Created by"
+    st.markdown(f"**{label}:** {', '.join(details['directors'])}")
+
+# Cast
+if details.get("cast"):
+    st.subheader("Cast")
+    cols = st.columns(5)
+    for idx, person in enumerate(details["cast"]):
+        with cols[idx % 5]:
+            if person.get("profile_path"):
+                st.image(f"https://image.tmdb.org/t/p/w185{person['profile_path']}", width=80)
+            st.caption(f"**{person['name']}**" + (f" as {person['character']}" if person.get("character") else ""))
+
 # Watch Providers
 st.subheader("Where to Watch")
 allowed_countries = {
@@ -105,6 +115,22 @@ for idx, (code, name) in enumerate(allowed_countries.items()):
 
 
 
+# Similar Titles
+if details.get("similar"):
+    st.subheader("Similar Titles")
+    cols = st.columns(6)
+    for idx, similar in enumerate(details["similar"]):
+        with cols[idx % 6]:
+            similar_url = f"/details?media_type={media_type}&id={similar['id']}"
+            if similar.get("poster_path"):
+                st.markdown(
+                    f'<a href="{similar_url}" target="_blank">'
+                    f'<img src="https://image.tmdb.org/t/p/w185{similar["poster_path"]}" width="100" style="border-radius:8px;">'
+                    f'</a>',
+                    unsafe_allow_html=True
+                )
+            st.caption(similar["title"])
+
 st.subheader("Item ID : ")
 st.subheader(item_id)
 # More Details Section
@@ -125,7 +151,7 @@ else:
 
 # Letterboxd Link (only for movies)
 if media_type == "movie":
-    title_slug = details.get("title", "").lower().replace(" ", "-")
+    title_slug = (details.get("title") or "").lower().replace(" ", "-")
     letterboxd_url = f"https://letterboxd.com/tmdb/{item_id}"
     st.markdown(f"**Letterboxd:** [View on Letterboxd ↗]({letterboxd_url})")
 
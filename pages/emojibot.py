@@ -1,25 +1,19 @@
-import requests
 import random
 import streamlit as st
-import os
-from dotenv import load_dotenv
 import emoji
+from tmdb import TMDB_API_KEY, TMDB_IMAGE_BASE_URL
+from db import get_user_item_keys, begin_request
+import snapshots
+import candidate_pools
+import prefetch
 
-# Load API Key from .env
-load_dotenv()
-API_KEY = os.getenv("TMDB_API_KEY")
+# Start a fresh db identity map for this script run
+begin_request()
 
-if not API_KEY:
+if not TMDB_API_KEY:
     st.error("API Key not found! Make sure to set it in the .env file.")
     st.stop()
 
-# TMDB URLs
-TMDB_GENRES_LIST_URL = "https://api.themoviedb.org/3/genre/movie/list"
-TMDB_TV_GENRES_LIST_URL = "https://api.themoviedb.org/3/genre/tv/list"
-TMDB_MOVIES_URL = "https://api.themoviedb.org/3/discover/movie"
-TMDB_TV_URL = "https://api.themoviedb.org/3/discover/tv"
-TMDB_TRENDING_URL = "https://api.themoviedb.org/3/trending/{media_type}/week"
-
 # Updated Emoji-to-Genre Mapping with better TV show coverage
 EMOJI_TO_GENRE = {
     # Happy/Comforting
@@ -64,48 +58,22 @@ EMOJI_TO_GENRE = {
     }
 }
 
-# Fetch TMDB Genre Mapping with caching
-@st.cache_data
+# TMDB Genre Mapping from the background-refreshed genre lists
 def fetch_genre_mapping():
-    movie_response = requests.get(TMDB_GENRES_LIST_URL, params={"api_key": API_KEY})
-    tv_response = requests.get(TMDB_TV_GENRES_LIST_URL, params={"api_key": API_KEY})
-    
-    mapping = {"movie": {}, "tv": {}}
-    
-    if movie_response.status_code == 200:
-        for genre in movie_response.json().get("genres", []):
-            mapping["movie"][genre["name"]] = genre["id"]
-    
-    if tv_response.status_code == 200:
-        for genre in tv_response.json().get("genres", []):
-            mapping["tv"][genre["name"]] = genre["id"]
-    
-    return mapping
+    return {
+        "movie": {genre["name"]: genre["id"] for genre in snapshots.get("genres/movie")},
+        "tv": {genre["name"]: genre["id"] for genre in snapshots.get("genres/tv")}
+    }
 
 GENRE_MAPPING = fetch_genre_mapping()
 
-def fetch_content(genre_ids, content_type="movie", sort_by="popularity.desc"):
-    try:
-        url = TMDB_MOVIES_URL if content_type == "movie" else TMDB_TV_URL
-        params = {
-            "api_key": API_KEY,
-            "with_genres": ",".join(map(str, genre_ids)),
-            "sort_by": sort_by,
-            "vote_count.gte": 100  # Ensure only reasonably popular content
-        }
-        response = requests.get(url, params=params, timeout=10)
-        return response.json().get("results", []) if response.status_code == 200 else []
-    except requests.exceptions.RequestException:
-        return []
-
-def fetch_trending(content_type="movie"):
-    try:
-        url = TMDB_TRENDING_URL.format(media_type=content_type)
-        params = {"api_key": API_KEY}
-        response = requests.get(url, params=params, timeout=10)
-        return response.json().get("results", []) if response.status_code == 200 else []
-    except requests.exceptions.RequestException:
-        return []
+def fetch_content(genre_ids, content_type="movie"):
+    # Sampled from the shared genre pools; already watched titles are skipped
+    watched = get_user_item_keys(st.session_state.username, "watched") if st.session_state.get("logged_in") else set()
+    return candidate_pools.sample(
+        content_type, genre_ids, exclude=watched, limit=10,
+        min_votes=100  # Ensure only reasonably popular content
+    )
 
 # Streamlit UI
 st.title("🎬 Emoji-Based Movie & TV Show Recommendation")
@@ -127,8 +95,11 @@ if selected_emoji:
         tv_genre_ids = [GENRE_MAPPING["tv"][g] for g in genres["tv"] if g in GENRE_MAPPING["tv"]]
 
         # First try to get content by genre, fall back to trending if no results
-        movies = fetch_content(movie_genre_ids, "movie") or fetch_trending("movie")
-        tv_shows = fetch_content(tv_genre_ids, "tv") or fetch_trending("tv")
+        movies = fetch_content(movie_genre_ids, "movie") or snapshots.get("trending/movie")
+        tv_shows = fetch_content(tv_genre_ids, "tv") or snapshots.get("trending/tv")
+        
+        # Warm the details pages these posters link to
+        prefetch.enqueue([("movie", movie["id"]) for movie in movies[:10]] + [("tv", show["id"]) for show in tv_shows[:10]])
 
         # Show Movies Section
         if movies:
@@ -137,7 +108,7 @@ if selected_emoji:
             for idx, movie in enumerate(movies[:10]):  # Show top 10
                 title = movie.get("title", "Unknown")
                 poster_path = movie.get("poster_path", "")
-                poster_url = f"https://image.tmdb.org/t/p/w500{poster_path}" if poster_path else "https://via.placeholder.com/180x270"
+                poster_url = f"{TMDB_IMAGE_BASE_URL}{poster_path}" if poster_path else "https://via.placeholder.com/180x270"
                 item_id = movie.get("id")
                 
                 with cols[idx % 5]:
@@ -154,7 +125,7 @@ if selected_emoji:
             for idx, tv_show in enumerate(tv_shows[:10]):  # Show top 10
                 title = tv_show.get("name", "Unknown")
                 poster_path = tv_show.get("poster_path", "")
-                poster_url = f"https://image.tmdb.org/t/p/w500{poster_path}" if poster_path else "https://via.placeholder.com/180x270"
+                poster_url = f"{TMDB_IMAGE_BASE_URL}{poster_path}" if poster_path else "https://via.placeholder.com/180x270"
                 item_id = tv_show.get("id")
                 
                 with cols[idx % 5]:
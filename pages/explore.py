@@ -1,24 +1,29 @@
 import streamlit as st
-import requests
-import os
+import time
 import random
-from dotenv import load_dotenv
 from collections import Counter
-from db import get_user_content, get_friends, get_recommendations
-import hashlib
-import time
-
-# Load environment variables
-load_dotenv()
+from db import (
+    get_user_item_keys,
+    get_content_version,
+    get_taste_profile,
+    begin_request
+)
+from tmdb import TMDB_IMAGE_BASE_URL, show_degraded_banner
+import snapshots
+import candidate_pools
+import prefetch
 
 # Configuration
-TMDB_API_KEY = os.getenv("TMDB_API_KEY")
-TMDB_IMAGE_BASE_URL = "https://image.tmdb.org/t/p/w500"
 ITEMS_TO_SHOW = 16
+LOADING_RETRY_DELAY = 2  # Seconds between reruns while a cold process has nothing to show yet
+LOADING_RETRIES = 15
 
 # Set page config
 st.set_page_config(page_title="Explore Recommendations", layout="wide")
 
+# Start a fresh db identity map for this script run
+begin_request()
+
 # CSS Styling
 st.markdown("""
 <style>
@@ -54,81 +59,30 @@ username = st.session_state.get("username", "Guest")
 
 # --- Helper Functions ---
 
-def get_content_fingerprint():
-    """Create unique fingerprint that changes with login state and time"""
-    user_content = get_user_content(username)
-    friends = get_friends(username)
-    recommendations = get_recommendations(username)
-    return hashlib.sha256(
-        f"{user_content}{friends}{recommendations}{time.time()}".encode()
-    ).hexdigest()
-
 def get_user_watched_ids():
     """Get set of all watched content IDs for the user"""
-    user_content = get_user_content(username)
-    return {(item["type"], item["id"]) for item in user_content.get("watched", [])}
+    return get_user_item_keys(username, "watched")
 
 def fetch_tmdb_genres():
     """Fetch genre mappings from TMDB API"""
-    try:
-        movie_genres = requests.get(
-            "https://api.themoviedb.org/3/genre/movie/list",
-            params={"api_key": TMDB_API_KEY},
-            timeout=10
-        ).json().get("genres", [])
-        
-        tv_genres = requests.get(
-            "https://api.themoviedb.org/3/genre/tv/list",
-            params={"api_key": TMDB_API_KEY},
-            timeout=10
-        ).json().get("genres", [])
-        
-        return {
-            "movie": {g["id"]: g["name"] for g in movie_genres},
-            "tv": {g["id"]: g["name"] for g in tv_genres}
-        }
-    except Exception:
-        return {"movie": {}, "tv": {}}
+    return {
+        "movie": {g["id"]: g["name"] for g in snapshots.get("genres/movie")},
+        "tv": {g["id"]: g["name"] for g in snapshots.get("genres/tv")}
+    }
 
 def analyze_user_preferences():
     """Analyze user's preferences with randomization factor"""
-    user_content = get_user_content(username)
-    friends = get_friends(username)
-    recommendations = get_recommendations(username)
-    
-    genre_weights = Counter()
-    
-    # 1. User's liked content (highest weight with randomness)
-    for item in user_content.get("liked", []):
-        try:
-            url = f"https://api.themoviedb.org/3/{item['type']}/{item['id']}"
-            response = requests.get(url, params={"api_key": TMDB_API_KEY}, timeout=5)
-            if response.status_code == 200:
-                for genre in response.json().get("genres", []):
-                    genre_weights[genre["name"]] += 8 + random.random()
-        except:
-            continue
-    
-    # 2. Friends' recommendations (medium weight if matching with randomness)
-    for rec in recommendations:
-        try:
-            url = f"https://api.themoviedb.org/3/{rec['media_type']}/{rec['item_id']}"
-            response = requests.get(url, params={"api_key": TMDB_API_KEY}, timeout=5)
-            if response.status_code == 200:
-                for genre in response.json().get("genres", []):
-                    if genre["name"] in genre_weights:
-                        genre_weights[genre["name"]] += 4 + random.random()
-        except:
-            continue
+    # The persisted taste vector is kept up to date by every write (and rebuilt
+    # from history once for older accounts), so this is one read
+    taste = get_taste_profile(username)
     
     # If no preferences, use some default genres
-    if not genre_weights:
+    if not taste:
         return {"Action": 5, "Comedy": 5, "Drama": 5}
-    
-    return genre_weights
+    return Counter({genre: weight + random.random() for genre, weight in taste.items()})
 
 def fetch_tmdb_recommendations(genres, media_type, exclude_ids):
-    """Fetch recommendations with strong preference for popular/high-rated content"""
+    """Pick popular/high-rated titles in the user's top genres from the candidate pools"""
     genre_mapping = fetch_tmdb_genres()
     genre_ids = []
     
@@ -136,53 +90,23 @@ def fetch_tmdb_recommendations(genres, media_type, exclude_ids):
     for genre_name in genres:
         for genre_id, name in genre_mapping[media_type].items():
             if name.lower() == genre_name.lower():
-                genre_ids.append(str(genre_id))
+                genre_ids.append(genre_id)
                 break
     
-    try:
-        # Add some randomness to parameters
-        params = {
-            "api_key": TMDB_API_KEY,
-            "with_genres": ",".join(genre_ids),
-            "sort_by": "popularity.desc,vote_average.desc",
-            "vote_count.gte": 50,
-            "vote_average.gte": 6.0,
-            "language": "en-US",
-            "page": random.randint(1, 3)  # Random page for variety
-        }
-        
-        url = f"https://api.themoviedb.org/3/discover/{media_type}"
-        response = requests.get(url, params=params, timeout=10)
-        if response.status_code == 200:
-            results = response.json().get("results", [])
-            # Filter out watched and adult content
-            filtered = [
-                item for item in results 
-                if not item.get("adult", False) and 
-                (media_type, item["id"]) not in exclude_ids
-            ]
-            return filtered[:ITEMS_TO_SHOW]
-    except Exception:
-        pass
+    # Random picks from the shared genre pools give variety without extra API calls
+    recommendations = candidate_pools.sample(
+        media_type, genre_ids, exclude=exclude_ids, limit=ITEMS_TO_SHOW,
+        min_votes=50, min_rating=6.0
+    )
+    if recommendations:
+        return recommendations
     
-    # Fallback to trending content if discovery fails
-    try:
-        url = f"https://api.themoviedb.org/3/trending/{media_type}/week"
-        params = {"api_key": TMDB_API_KEY}
-        response = requests.get(url, params=params, timeout=10)
-        if response.status_code == 200:
-            results = response.json().get("results", [])
-            filtered = [
-                item for item in results 
-                if not item.get("adult", False) and 
-                (media_type, item["id"]) not in exclude_ids
-            ]
-            return filtered[:ITEMS_TO_SHOW]
-    except Exception:
-        pass
-    
-    # Final fallback - return empty list if all fails
-    return []
+    # Fallback to the in-memory trending list until the pools are built
+    return [
+        item for item in snapshots.get(f"trending/{media_type}")
+        if not item.get("adult", False) and 
+        (media_type, item["id"]) not in exclude_ids
+    ][:ITEMS_TO_SHOW]
 
 def display_recommendations(title, recommendations, media_type):
     """Display recommendations in a grid"""
@@ -192,6 +116,8 @@ def display_recommendations(title, recommendations, media_type):
         st.info(f"Loading {media_type} recommendations...")
         return
     
+    # Warm the details pages these posters link to
+    prefetch.enqueue([(media_type, item["id"]) for item in recommendations[:ITEMS_TO_SHOW]])
     cols = st.columns(4)
     for idx, item in enumerate(recommendations[:ITEMS_TO_SHOW]):
         with cols[idx % 4]:
@@ -217,17 +143,20 @@ def display_recommendations(title, recommendations, media_type):
 
 st.title("🎬 Explore Recommendations")
 
+show_degraded_banner()
+
 # Initialize session state
 if "recommendations_data" not in st.session_state:
     st.session_state.recommendations_data = {
-        "fingerprint": "",
+        "version": None,
         "movie_recs": [],
         "tv_recs": []
     }
 
-# Check if we need to refresh
-current_fingerprint = get_content_fingerprint()
-if current_fingerprint != st.session_state.recommendations_data["fingerprint"]:
+# Recompute only when the user's content version or the candidate pools have moved
+# since the last run, so picks made from the cold-start fallback are replaced
+current_version = (username, get_content_version(username), candidate_pools.generation())
+if current_version != st.session_state.recommendations_data["version"]:
     with st.spinner("Updating recommendations..."):
         watched_ids = get_user_watched_ids()
         genre_weights = analyze_user_preferences()
@@ -236,15 +165,18 @@ if current_fingerprint != st.session_state.recommendations_data["fingerprint"]:
         top_genres = [g[0] for g in sorted(genre_weights.items(), key=lambda x: x[1], reverse=True)[:3]]
         
         # Fetch new recommendations
+        movie_recs = fetch_tmdb_recommendations(top_genres, "movie", watched_ids) or []
+        tv_recs = fetch_tmdb_recommendations(top_genres, "tv", watched_ids) or []
         st.session_state.recommendations_data = {
-            "fingerprint": current_fingerprint,
-            "movie_recs": fetch_tmdb_recommendations(top_genres, "movie", watched_ids) or [],
-            "tv_recs": fetch_tmdb_recommendations(top_genres, "tv", watched_ids) or []
+            # An empty list only means nothing has loaded yet; don't keep it
+            "version": current_version if movie_recs and tv_recs else None,
+            "movie_recs": movie_recs,
+            "tv_recs": tv_recs
         }
 
-# Refresh button
-if st.button("🔄 Refresh Recommendations", key="refresh_btn"):
-    st.session_state.recommendations_data["fingerprint"] = ""
+# Shuffle button for fresh variety without any content change
+if st.button("🔀 Shuffle Recommendations", key="refresh_btn"):
+    st.session_state.recommendations_data["version"] = None
     st.rerun()
 
 # Display recommendations
@@ -256,4 +188,14 @@ display_recommendations("📺 Recommended TV Shows",
                        "tv")
 
 if st.button("← Back to Dashboard"):
-    st.switch_page("pages/dashboard.py")
\ No newline at end of file
+    st.switch_page("pages/dashboard.py")
+
+# Nothing loaded yet (cold process): rerun shortly instead of waiting for a click
+if st.session_state.recommendations_data["version"] is None:
+    retries = st.session_state.get("explore_loading_retries", 0)
+    if retries < LOADING_RETRIES:
+        st.session_state.explore_loading_retries = retries + 1
+        time.sleep(LOADING_RETRY_DELAY)
+        st.rerun()
+else:
+    st.session_state.explore_loading_retries = 0
\ No newline at end of file
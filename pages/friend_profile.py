@@ -1,10 +1,13 @@
 import streamlit as st
-from db import get_user_content, add_recommendation
+from db import get_user_items, add_recommendation, begin_request
 #Checking Changes
 
 # Set page config
 st.set_page_config(page_title="Friend Profile", layout="wide")
 
+# Start a fresh db identity map for this script run
+begin_request()
+
 # Add padding CSS
 st.markdown("""
 <style>
@@ -52,17 +55,18 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.header(f"🎬 {friend}'s Watched Content")
-    content = get_user_content(friend)
-    if content["watched"]:
-        for item in content["watched"]:
+    watched, _ = get_user_items(friend, "watched", limit=None)
+    if watched:
+        for item in watched:
             st.write(f"- {item['title']} ({item['type'].capitalize()})")
     else:
         st.info(f"{friend} hasn't watched anything yet")
 
 with col2:
     st.header(f"❤️ {friend}'s Liked Content")
-    if content["liked"]:
-        for item in content["liked"]:
+    liked, _ = get_user_items(friend, "liked", limit=None)
+    if liked:
+        for item in liked:
             st.write(f"- {item['title']} ({item['type'].capitalize()})")
     else:
         st.info(f"{friend} hasn't liked anything yet")
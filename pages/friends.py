@@ -3,12 +3,16 @@ from db import (
     get_friends,
     get_friend_requests,
     send_friend_request,
-    respond_friend_request
+    respond_friend_request,
+    begin_request
 )
 
 # Set page config
 st.set_page_config(page_title="Friends", layout="wide")
 
+# Start a fresh db identity map for this script run
+begin_request()
+
 # Add padding CSS
 st.markdown("""
 <style>
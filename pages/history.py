@@ -1,28 +1,16 @@
 import streamlit as st
-import requests
+from db import get_user_items, get_recommendations, remove_content, remove_recommendation, begin_request
+from tmdb import TMDB_IMAGE_BASE_URL
+from catalog import fetch_posters
+from exporter import export_history, FORMATS
+import tempfile
 import os
-from db import get_user_content, get_recommendations, remove_content, remove_recommendation
 
 # Set page config
 st.set_page_config(page_title="History", layout="wide")
 
-# TMDB API Configuration
-API_KEY = os.getenv("TMDB_API_KEY")
-TMDB_IMAGE_BASE_URL = "https://image.tmdb.org/t/p/w500"
-
-# Function to fetch poster
-def fetch_poster(media_type, item_id):
-    url = f"https://api.themoviedb.org/3/{media_type}/{item_id}"
-    try:
-        response = requests.get(url, params={"api_key": API_KEY}, timeout=10)
-        response.raise_for_status()
-        if response.status_code == 200:
-            return response.json().get("poster_path")
-        else:
-            st.error(f"Error fetching poster: {response.status_code}")
-    except requests.exceptions.RequestException as e:
-        st.error(f"An error occurred: {str(e)}")
-    return None
+# Start a fresh db identity map for this script run
+begin_request()
 
 # Authentication Check
 if "logged_in" not in st.session_state or not st.session_state["logged_in"]:
@@ -35,19 +23,20 @@ username = st.session_state.get("username", "Guest")
 # Streamlit UI
 st.title(f"Your Collection, {username}!")
 
-# Fetch Content from Database
-user_content = get_user_content(username)
-watched_content = user_content.get("watched", [])
-liked_content = user_content.get("liked", [])
+# Fetch Content from Database, newest first; the full list is read only after "Show All"
+def load_list(content_type):
+    show_all = st.session_state.get(f"show_all_{content_type}", False)
+    return get_user_items(username, content_type, limit=None if show_all else 8)
+
+watched_content, more_watched = load_list("watched")
+liked_content, more_liked = load_list("liked")
 recommendations = get_recommendations(username)
 
-# Reverse the lists to display the most recent first
-watched_content.reverse()
-liked_content.reverse()
+# Reverse the recommendations to display the most recent first
 recommendations.reverse()
 
 # Function to display content with expand/shrink option
-def display_content_section(title, icon, content, content_type="watched"):
+def display_content_section(title, icon, content, content_type="watched", has_more=False):
     st.markdown(f"## {icon} {title}")
     
     if not content:
@@ -62,13 +51,19 @@ def display_content_section(title, icon, content, content_type="watched"):
     show_all = st.session_state[f"show_all_{content_type}"]
     items_to_show = content if show_all else content[:8]
     
+    # Resolve posters not stored on the entry in one parallel batch
+    if content_type == "recommendations":
+        keys = [(item["media_type"], item["item_id"]) for item in items_to_show]
+    else:
+        keys = [(item["type"], item["id"]) for item in items_to_show]
+    posters = fetch_posters([key for key, item in zip(keys, items_to_show) if "poster_path" not in item])
+    
     # Display content
     cols = st.columns(4)
     for idx, item in enumerate(items_to_show):
         with cols[idx % 4]:
-            poster_path = fetch_poster(item["type"] if content_type != "recommendations" else item["media_type"], 
-                                    item["id"] if content_type != "recommendations" else item["item_id"])
-            details_url = f"/details?media_type={item['type'] if content_type != 'recommendations' else item['media_type']}&id={item['id'] if content_type != 'recommendations' else item['item_id']}"
+            poster_path = item.get("poster_path") or posters.get(keys[idx])
+            details_url = f"/details?media_type={keys[idx][0]}&id={keys[idx][1]}"
             
             if poster_path:
                 st.markdown(
@@ -96,25 +91,46 @@ def display_content_section(title, icon, content, content_type="watched"):
                 st.caption(item["title"])
                 # Remove from watched/liked button
                 if st.button("Remove", key=f"remove_{content_type}_{item['id']}_{idx}"):
-                    if remove_content(username, content_type, item["id"]):
+                    if remove_content(username, content_type, item["type"], item["id"]):
                         st.success(f"Removed from {content_type}: {item['title']}")
                         st.rerun()
     
     # Show expand/shrink button if there are more than 8 items
-    if len(content) > 8:
+    if len(content) > 8 or has_more:
         if st.button("Show All" if not show_all else "Show Less", 
                     key=f"toggle_{content_type}"):
             st.session_state[f"show_all_{content_type}"] = not st.session_state[f"show_all_{content_type}"]
             st.rerun()
 
 # Display Watched Content
-display_content_section("Watched Content", "🎬", watched_content, "watched")
+display_content_section("Watched Content", "🎬", watched_content, "watched", more_watched)
 
 # Display Liked Content
-display_content_section("Liked Content", "❤️", liked_content, "liked")
+display_content_section("Liked Content", "❤️", liked_content, "liked", more_liked)
 
 # Display Recommendations
 display_content_section("Recommendations", "💌", recommendations, "recommendations")
 
+# Export
+st.markdown("## 📤 Export Your Data")
+st.caption("Watched, liked, friends and received recommendations")
+export_format = st.radio("Format", FORMATS, format_func=str.upper, horizontal=True)
+if st.button("Prepare Export"):
+    # Records stream from Mongo cursors into a temp file; Streamlit reads the file
+    # into memory to serve the download, so it is removed right after
+    out = tempfile.NamedTemporaryFile(suffix=f".{export_format}", delete=False)
+    try:
+        with out:
+            count = export_history(username, out, export_format)
+        with open(out.name, "rb") as data:
+            st.download_button(
+                f"⬇️ Download {count} records",
+                data=data,
+                file_name=f"{username}_history.{export_format}",
+                mime="application/x-ndjson" if export_format == "ndjson" else "text/csv"
+            )
+    finally:
+        os.remove(out.name)
+
 if st.button("← Back to Dashboard"):
     st.switch_page("pages/dashboard.py")
\ No newline at end of file
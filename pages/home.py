@@ -1,8 +1,14 @@
 import streamlit as st
-import requests
-import os
-from db import add_watched_content, add_liked_content, get_friends, get_user_content
-from datetime import datetime
+from db import add_watched_content, add_liked_content, get_friends_activity, get_popular_with_friends, begin_request
+from tmdb import content_metadata, show_degraded_banner
+from search import search_titles
+from snapshots import get_snapshot
+import prefetch
+import time
+from catalog import fetch_posters
+
+# Start a fresh db identity map for this script run
+begin_request()
 
 # Add this at the top of home.py (right after imports)
 st.markdown("""
@@ -68,64 +74,9 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def get_friends_activity(username, limit=8):
-    """Get recently watched items from friends"""
-    friends = get_friends(username)
-    all_watched = []
-    
-    for friend in friends:
-        friend_content = get_user_content(friend)
-        for item in friend_content.get("watched", []):
-            # Ensure added_at is datetime object
-            if isinstance(item.get("added_at"), str):
-                try:
-                    item["added_at"] = datetime.fromisoformat(item["added_at"])
-                except ValueError:
-                    item["added_at"] = datetime.min  # Fallback to minimum date if parsing fails
-            elif not isinstance(item.get("added_at"), datetime):
-                item["added_at"] = datetime.min  # Fallback if not datetime
-            
-            item["friend_username"] = friend
-            all_watched.append(item)
-    
-    # Sort by datetime object (newest first)
-    all_watched.sort(key=lambda x: x.get("added_at", datetime.min), reverse=True)
-    return all_watched[:limit]
-
-def get_popular_with_friends(username):
-    """Get items most frequently watched by friends with high ratings"""
-    friends = get_friends(username)
-    content_counts = {}
-    
-    for friend in friends:
-        friend_content = get_user_content(friend)
-        for item in friend_content.get("watched", []):
-            key = (item["type"], item["id"], item["title"])
-            if key not in content_counts:
-                content_counts[key] = {
-                    "count": 0,
-                    "friend_usernames": []
-                }
-            content_counts[key]["count"] += 1
-            content_counts[key]["friend_usernames"].append(friend)
-    
-    # Sort by watch count (descending)
-    sorted_items = sorted(content_counts.items(), key=lambda x: x[1]["count"], reverse=True)
-    
-    # Convert to list of items with metadata
-    result = []
-    for (media_type, item_id, title), data in sorted_items[:8]:
-        result.append({
-            "type": media_type,
-            "id": item_id,
-            "title": title,
-            "watch_count": data["count"],
-            "friends": data["friend_usernames"]
-        })
-    
-    return result
-
 def display_content(items, media_type, caption_field="title"):
+    # Warm the details pages these posters link to
+    prefetch.enqueue([(media_type, item["id"]) for item in items[:8] if item.get("id")])
     cols = st.columns(4)
     for i, item in enumerate(items[:8]):
         with cols[i % 4]:
@@ -166,7 +117,8 @@ def display_content(items, media_type, caption_field="title"):
                             st.session_state.username,
                             media_type,
                             item_id,
-                            title
+                            title,
+                            content_metadata(item, media_type)
                         )
                         st.success(f"Added {title} to watched list!")
                 with col2:
@@ -175,46 +127,30 @@ def display_content(items, media_type, caption_field="title"):
                             st.session_state.username,
                             media_type,
                             item_id,
-                            title
+                            title,
+                            content_metadata(item, media_type)
                         )
                         st.success(f"Added {title} to liked list!")
             
             st.caption(item.get(caption_field, title))
 
-def fetch_poster(media_type, item_id):
-    API_KEY = os.getenv("TMDB_API_KEY")
-    url = f"https://api.themoviedb.org/3/{media_type}/{item_id}"
-    response = requests.get(url, params={"api_key": API_KEY})
-    if response.status_code == 200:
-        return response.json().get("poster_path")
-    return None
-
-def fetch_popular_movies():
-    API_KEY = os.getenv("TMDB_API_KEY")
-    url = f"https://api.themoviedb.org/3/movie/popular?api_key={API_KEY}"
-    response = requests.get(url)
-    return response.json().get("results", []) if response.status_code == 200 else []
-
-def fetch_popular_tv():
-    API_KEY = os.getenv("TMDB_API_KEY")
-    url = f"https://api.themoviedb.org/3/tv/popular?api_key={API_KEY}"
-    response = requests.get(url)
-    return response.json().get("results", []) if response.status_code == 200 else []
-
-def search_content(query):
-    API_KEY = os.getenv("TMDB_API_KEY")
-    url = "https://api.themoviedb.org/3/search/multi"
-    params = {"api_key": API_KEY, "query": query}
-    response = requests.get(url, params=params)
-    return response.json().get("results", []) if response.status_code == 200 else []
+def display_snapshot(name, media_type):
+    """Show a background-refreshed list, noting its age if the last refresh failed"""
+    snapshot = get_snapshot(name)
+    if snapshot.stale and snapshot.fetched_at:
+        updated = time.strftime("%H:%M", time.localtime(snapshot.fetched_at))
+        st.caption(f"⚠️ Couldn't reach TMDB, showing the list from {updated}")
+    display_content(snapshot.data, media_type)
 
 # --- Streamlit UI Code ---
 st.title("🎬 Entertainment Explorer")
 
+show_degraded_banner()
+
 query = st.text_input("🔍 Search for movies or TV shows...")
 
 if query:
-    results = search_content(query)
+    results = search_titles(query)
     movies = [r for r in results if r.get("media_type") == "movie"]
     tv_shows = [r for r in results if r.get("media_type") == "tv"]
     
@@ -227,12 +163,10 @@ if query:
         display_content(tv_shows, "tv")
 else:
     st.subheader("Popular Movies")
-    movies = fetch_popular_movies()
-    display_content(movies, "movie")
+    display_snapshot("popular/movie", "movie")
     
     st.subheader("Popular TV Shows")
-    tv_shows = fetch_popular_tv()
-    display_content(tv_shows, "tv")
+    display_snapshot("popular/tv", "tv")
 
     # New Friends Activity Sections (only shown when logged in)
     if st.session_state.get("logged_in", False):
@@ -242,8 +176,9 @@ else:
         
         if friends_activity:
             # Enhance items with poster paths
+            posters = fetch_posters([(item["type"], item["id"]) for item in friends_activity if not item.get("poster_path")])
             for item in friends_activity:
-                item["poster_path"] = fetch_poster(item["type"], item["id"])
+                item["poster_path"] = item.get("poster_path") or posters.get((item["type"], item["id"]))
             
             cols = st.columns(4)
             for idx, item in enumerate(friends_activity[:8]):
@@ -279,8 +214,9 @@ else:
         
         if popular_with_friends:
             # Enhance items with poster paths
+            posters = fetch_posters([(item["type"], item["id"]) for item in popular_with_friends if not item.get("poster_path")])
             for item in popular_with_friends:
-                item["poster_path"] = fetch_poster(item["type"], item["id"])
+                item["poster_path"] = item.get("poster_path") or posters.get((item["type"], item["id"]))
                 item["friends_count"] = f"{item['watch_count']} friends watched"
             
             cols = st.columns(4)
@@ -0,0 +1,65 @@
+import streamlit as st
+from db import begin_request
+from importer import import_history
+
+# Set page config
+st.set_page_config(page_title="Import History", layout="wide")
+
+# Start a fresh db identity map for this script run
+begin_request()
+
+# Add padding CSS
+st.markdown("""
+<style>
+    [data-testid="stAppViewContainer"] > .main {
+        padding: 2rem 5rem !important;
+    }
+    @media (max-width: 768px) {
+        [data-testid="stAppViewContainer"] > .main {
+            padding: 2rem 1rem !important;
+        }
+    }
+</style>
+""", unsafe_allow_html=True)
+
+# Authentication Check
+if "logged_in" not in st.session_state or not st.session_state["logged_in"]:
+    st.warning("Please log in to import your history")
+    st.stop()
+
+username = st.session_state.get("username", "Guest")
+
+st.title("📥 Import Your History")
+st.markdown("""
+Bring your history over from another service:
+- **Letterboxd:** `watched.csv`, `diary.csv` or `likes/films.csv` from *Settings → Import & Export*
+- **IMDb:** the ratings or list CSV export
+- **Trakt:** a JSON export such as `watched-movies.json` or `history.json`
+""")
+
+uploaded = st.file_uploader("Export file", type=["csv", "json"])
+list_name = st.radio("Add titles to", ["watched", "liked"], horizontal=True)
+
+if uploaded and st.button("Import"):
+    progress_bar = st.progress(0.0)
+    status = st.empty()
+    
+    def report(stats):
+        # The upload is read front to back, so its position tracks progress
+        progress_bar.progress(min(uploaded.tell() / max(uploaded.size, 1), 1.0))
+        status.write(f"Read {stats['read']} entries, added {stats['imported']} titles")
+    
+    try:
+        stats = import_history(username, uploaded, list_name, progress=report)
+    except ValueError as e:
+        st.error(str(e))
+    else:
+        progress_bar.progress(1.0)
+        st.success(f"Added {stats['imported']} new titles to your {list_name} list!")
+        if stats["unresolved"]:
+            st.warning(f"{stats['unresolved']} entries couldn't be matched to a TMDB title")
+        if stats["skipped"]:
+            st.info(f"{stats['skipped']} entries were skipped (episodes, games or empty rows)")
+
+if st.button("← Back to Dashboard"):
+    st.switch_page("pages/dashboard.py")
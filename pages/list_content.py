@@ -1,11 +1,13 @@
 import streamlit as st
-from db import get_user_content
-import requests
-import os
+from db import get_user_items, remove_content, begin_request
+from catalog import fetch_posters
 
 # Set page config FIRST
 st.set_page_config(layout="wide")
 
+# Start a fresh db identity map for this script run
+begin_request()
+
 # Add the padding CSS
 st.markdown("""
 <style>
@@ -31,24 +33,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def fetch_poster(media_type, item_id):
-    API_KEY = os.getenv("TMDB_API_KEY")
-    url = f"https://api.themoviedb.org/3/{media_type}/{item_id}"
-    response = requests.get(url, params={"api_key": API_KEY})
-    if response.status_code == 200:
-        return response.json().get("poster_path")
-    return None
-
-def remove_content(username, content_type, item_id):
-    """Remove item from watched or liked list"""
-    from db import users_collection
-    
-    update_result = users_collection.update_one(
-        {"username": username},
-        {"$pull": {content_type: {"id": item_id}}}
-    )
-    return update_result.modified_count > 0
-
 # Get content type from session state
 content_type = st.session_state.get("list_content_type", "watched")
 
@@ -58,15 +42,26 @@ if "logged_in" not in st.session_state or not st.session_state.logged_in:
     st.warning("Please log in to view this content")
     st.stop()
 
-content = get_user_content(st.session_state.username)[content_type]
+# Cursor pagination: a stack of page cursors lets us step back without offsets
+PAGE_SIZE = 24
+cursor_key = f"list_cursors_{content_type}"
+if cursor_key not in st.session_state:
+    st.session_state[cursor_key] = [None]
+cursors = st.session_state[cursor_key]
+
+content, next_cursor = get_user_items(st.session_state.username, content_type, after=cursors[-1], limit=PAGE_SIZE)
+if not content and len(cursors) > 1:
+    cursors.pop()  # Page emptied by removals, step back
+    st.rerun()
 
 if not content:
     st.info(f"You haven't {content_type} anything yet")
 else:
+    posters = fetch_posters([(item["type"], item["id"]) for item in content if "poster_path" not in item])
     cols = st.columns(4)
     for idx, item in enumerate(content):
         with cols[idx % 4]:
-            poster_path = fetch_poster(item["type"], item["id"])
+            poster_path = item.get("poster_path") or posters.get((item["type"], item["id"]))
             title = item["title"]
             details_url = f"/details?media_type={item['type']}&id={item['id']}"
             
@@ -95,11 +90,23 @@ else:
             # Remove button
             if st.button(f"Remove from {content_type}", 
                         key=f"remove_{content_type}_{item['id']}_{idx}"):
-                if remove_content(st.session_state.username, content_type, item["id"]):
+                if remove_content(st.session_state.username, content_type, item["type"], item["id"]):
                     st.success(f"Removed {title} from your {content_type} list!")
                     st.rerun()
                 else:
                     st.error("Failed to remove item")
 
+# Page navigation
+prev_col, next_col = st.columns(2)
+with prev_col:
+    if len(cursors) > 1 and st.button("← Previous Page"):
+        cursors.pop()
+        st.rerun()
+with next_col:
+    if next_cursor and st.button("Next Page →"):
+        cursors.append(next_cursor)
+        st.rerun()
+
 if st.button("← Back to Dashboard"):
+    st.session_state[cursor_key] = [None]
     st.switch_page("pages/dashboard.py")
\ No newline at end of file
@@ -1,21 +1,20 @@
 import streamlit as st
-import requests
-import os
 from db import (
     get_friends,
     get_recommendations,
     add_recommendation,
-    remove_recommendation
+    remove_recommendation,
+    begin_request
 )
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-TMDB_API_KEY = os.getenv("TMDB_API_KEY")
+from search import search_titles
+from tmdb import show_degraded_banner
 
 # Set page config
 st.set_page_config(page_title="Recommendations", layout="wide")
 
+# Start a fresh db identity map for this script run
+begin_request()
+
 # Add padding CSS
 st.markdown("""
 <style>
@@ -35,30 +34,11 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def search_tmdb(query, media_type):
-    """Search TMDB for movies or TV shows matching the query"""
-    url = f"https://api.themoviedb.org/3/search/{media_type}"
-    params = {
-        "api_key": TMDB_API_KEY,
-        "query": query,
-        "language": "en-US",
-        "page": 1
-    }
-    response = requests.get(url, params=params)
-    if response.status_code == 200:
-        results = response.json().get("results", [])
-        # Return list of (formatted_title, id) tuples sorted by popularity
-        formatted_results = []
-        for item in sorted(results, key=lambda x: x.get("popularity", 0), reverse=True):
-            if media_type == "movie":
-                year = item.get("release_date", "")[:4] if item.get("release_date") else "Unknown"
-                title = f"{item['title']} ({year})" if year else item['title']
-            else:
-                year = item.get("first_air_date", "")[:4] if item.get("first_air_date") else "Unknown"
-                title = f"{item['name']} ({year})" if year else item['name']
-            formatted_results.append((title, item["id"]))
-        return formatted_results
-    return []
+def format_result(item):
+    """Select box label: title and year"""
+    title = item.get("title") or item.get("name")
+    year = (item.get("release_date") or item.get("first_air_date") or "")[:4]
+    return f"{title} ({year})" if year else title
 
 # Authentication Check
 if "logged_in" not in st.session_state or not st.session_state["logged_in"]:
@@ -70,6 +50,8 @@ username = st.session_state.username
 # Recommendations Page
 st.title("💌 Recommendations")
 
+show_degraded_banner()
+
 # Received Recommendations
 st.header("📩 Recommendations For You")
 recommendations = get_recommendations(username)
@@ -113,21 +95,18 @@ if friends:
     search_results = []
     
     if title_query and len(title_query) > 2:
-        search_results = search_tmdb(title_query, media_type)
+        search_results = search_titles(title_query, media_type)
     
     selected_title = None
     selected_id = None
     
     if search_results:
-        # Create a select box with search results (title with year and ID)
-        options = [f"{title} (ID: {id})" for title, id in search_results]
-        selected_option = st.selectbox("Select from search results", options)
+        # Options are the result dicts themselves; only the label is formatted
+        selected = st.selectbox("Select from search results", search_results, format_func=format_result)
         
-        if selected_option:
-            # Extract the original title without year for storage
-            original_title = selected_option.split(" (ID: ")[0].split(" (20")[0].split(" (19")[0]
-            selected_title = original_title.strip()
-            selected_id = selected_option.split(" (ID: ")[1][:-1]
+        if selected:
+            selected_title = selected.get("title") or selected.get("name")
+            selected_id = str(selected["id"])
     
     # Display the selected title and ID (or allow manual entry)
     col1, col2 = st.columns(2)
@@ -0,0 +1,68 @@
+import os
+import streamlit as st
+import metrics
+from tmdb_limits import breaker
+
+# Comma-separated usernames allowed to see this page; unset means any logged-in user
+ADMIN_USERS = {name.strip() for name in os.getenv("ADMIN_USERS", "").split(",") if name.strip()}
+
+# Set page config
+st.set_page_config(page_title="Status", layout="wide")
+
+# Authentication Check
+if "logged_in" not in st.session_state or not st.session_state["logged_in"]:
+    st.warning("Please log in to view the status page")
+    st.stop()
+if ADMIN_USERS and st.session_state.get("username") not in ADMIN_USERS:
+    st.warning("This page is only available to admins")
+    st.stop()
+
+# Streamlit UI
+st.title("📊 Status")
+st.caption("In-process metrics for this server process since it started")
+
+snapshot = metrics.snapshot()
+counters, gauges, timings = snapshot["counters"], snapshot["gauges"], snapshot["timings"]
+
+# TMDB
+st.markdown("## 🎬 TMDB")
+cols = st.columns(4)
+cols[0].metric("Circuit breaker", breaker.state.replace("_", " ").title())
+cols[1].metric("Upstream requests", counters.get("tmdb.upstream", 0))
+cols[2].metric("Coalesced requests", counters.get("tmdb.coalesced", 0))
+cols[3].metric("Stale responses served", counters.get("tmdb.stale_served", 0))
+
+cols = st.columns(4)
+cols[0].metric("Rate limited (429)", counters.get("tmdb.rate_limited", 0))
+cols[1].metric("Short-circuited", counters.get("tmdb.short_circuited", 0))
+cols[2].metric("Throttle timeouts", counters.get("tmdb.throttle_timeouts", 0))
+throttle = timings.get("tmdb.throttle_wait_ms")
+cols[3].metric("Throttle wait p95", f"{throttle['p95']:.0f} ms" if throttle else "–")
+
+# Prefetch
+st.markdown("## ⚡ Prefetch")
+cols = st.columns(4)
+hit_rate = gauges.get("prefetch.hit_rate")
+cols[0].metric("Hit rate", f"{hit_rate:.0%}" if hit_rate is not None else "–")
+cols[1].metric("Queued", counters.get("prefetch.queued", 0))
+cols[2].metric("Fetched", counters.get("prefetch.fetched", 0))
+cols[3].metric("Dropped", counters.get("prefetch.dropped", 0))
+
+# Emotion Model
+st.markdown("## 🎭 Emotion Model")
+cols = st.columns(4)
+hits, misses = counters.get("emotion.cache_hits", 0), counters.get("emotion.cache_misses", 0)
+cols[0].metric("Cache hit rate", f"{hits / (hits + misses):.0%}" if hits + misses else "–")
+latency = timings.get("emotion.latency_ms")
+cols[1].metric("Latency p95", f"{latency['p95']:.0f} ms" if latency else "–")
+batch_size = timings.get("emotion.batch_size")
+cols[2].metric("Mean batch size", f"{batch_size['mean']:.1f}" if batch_size else "–")
+load_seconds = gauges.get("emotion.load_seconds")
+cols[3].metric("Load time", f"{load_seconds:.1f} s" if load_seconds is not None else "–")
+
+# Everything Else
+with st.expander("All metrics"):
+    st.json(snapshot)
+
+if st.button("🔄 Refresh"):
+    st.rerun()
@@ -0,0 +1,84 @@
+import time
+import queue
+import threading
+from collections import OrderedDict
+import metrics
+
+# Prefetch Configuration
+# Grids queue their visible titles; a few low-priority workers warm the
+# catalog so opening /details finds the item already stored
+QUEUE_SIZE = 500
+WORKERS = 2  # Per-process cap on concurrent prefetches
+REMEMBER = 5000  # Recently prefetched keys kept for dedupe and hit-rate
+REMEMBER_FOR = 30 * 60  # Seconds before a key may be prefetched again
+
+_queue = queue.Queue(maxsize=QUEUE_SIZE)
+_pending = set()
+_prefetched = OrderedDict()  # (media_type, id) -> time prefetched
+_lock = threading.Lock()
+_workers = []
+_hits = 0
+_views = 0
+
+def _key(media_type, item_id):
+    return (media_type, str(item_id))  # Query params give ids as strings, grids as ints
+
+def enqueue(keys):
+    """Queue (media_type, id) pairs for background prefetch; never blocks"""
+    _start()
+    now = time.time()
+    with _lock:
+        for media_type, item_id in keys:
+            key = _key(media_type, item_id)
+            prefetched_at = _prefetched.get(key)
+            if key in _pending or (prefetched_at and now - prefetched_at < REMEMBER_FOR):
+                continue
+            try:
+                _queue.put_nowait(key)
+            except queue.Full:
+                metrics.incr("prefetch.dropped")
+                return
+            _pending.add(key)
+            metrics.incr("prefetch.queued")
+
+def record_view(media_type, item_id):
+    """Count a details page view as a prefetch hit or miss"""
+    global _hits, _views
+    with _lock:
+        hit = _key(media_type, item_id) in _prefetched
+        _hits += hit
+        _views += 1
+        hit_rate = _hits / _views
+    metrics.incr("prefetch.hits" if hit else "prefetch.misses")
+    metrics.set_gauge("prefetch.hit_rate", hit_rate)
+
+def _work():
+    from catalog import get_items  # Deferred: catalog pulls in db
+    from tmdb import get_background_executor
+    while True:
+        key = _queue.get()
+        media_type, item_id = key
+        try:
+            fetched = bool(get_items([(media_type, int(item_id))], executor=get_background_executor()))
+        except Exception as e:
+            fetched = False
+            print("Prefetch error:", media_type, item_id, e)
+        metrics.incr("prefetch.fetched" if fetched else "prefetch.errors")
+        with _lock:
+            _pending.discard(key)
+            if fetched:
+                _prefetched[key] = time.time()
+                _prefetched.move_to_end(key)
+                while len(_prefetched) > REMEMBER:
+                    _prefetched.popitem(last=False)
+
+def _start():
+    if _workers:
+        return
+    with _lock:
+        if _workers:
+            return
+        for i in range(WORKERS):
+            worker = threading.Thread(target=_work, name=f"prefetch-{i}", daemon=True)
+            worker.start()
+            _workers.append(worker)
@@ -0,0 +1,48 @@
+"""Seed the friend activity feed from existing watched/liked histories.
+
+Usage: python -m scripts.backfill_activity [--batch-size 1000]
+
+The activity collection is written by add_watched_content and
+add_liked_content from now on; this copies entries recorded before it
+existed so "New from Friends" is not empty after deploying. Entries older
+than the feed TTL are skipped since the TTL index would drop them anyway.
+Safe to re-run: each entry is upserted on (actor, verb, type, id,
+created_at), so entries already in the feed are left alone.
+"""
+import argparse
+from pymongo import UpdateOne
+from datetime import datetime, timedelta
+from db import user_items_collection, activity_collection, ACTIVITY_TTL_DAYS
+
+def backfill(batch_size=1000):
+    cutoff = datetime.utcnow() - timedelta(days=ACTIVITY_TTL_DAYS)
+    cursor = user_items_collection.find(
+        {"added_at": {"$gte": cutoff}},
+        {"username": 1, "list": 1, "type": 1, "id": 1, "title": 1, "poster_path": 1, "added_at": 1}
+    ).batch_size(batch_size)
+
+    batch, inserted = [], 0
+    for entry in cursor:
+        batch.append(UpdateOne(
+            {
+                "actor": entry["username"],
+                "verb": entry["list"],
+                "type": entry["type"],
+                "id": entry["id"],
+                "created_at": entry["added_at"]
+            },
+            {"$setOnInsert": {"title": entry["title"], "poster_path": entry.get("poster_path")}},
+            upsert=True
+        ))
+        if len(batch) >= batch_size:
+            inserted += activity_collection.bulk_write(batch, ordered=False).upserted_count
+            batch = []
+    if batch:
+        inserted += activity_collection.bulk_write(batch, ordered=False).upserted_count
+    print(f"Done, {inserted} activity entries inserted")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    backfill(args.batch_size)
@@ -0,0 +1,64 @@
+"""Backfill TMDB metadata onto existing watched/liked entries.
+
+Usage: python -m scripts.backfill_metadata [--batch-size 200] [--after <user_items _id>]
+
+Entries written before metadata was stored at write time lack poster_path,
+genre_ids, genres, vote_average and release_year. This job finds them,
+resolves each distinct title once through the cached TMDB client and writes
+the metadata back to the batch's entries for that title, by _id, with
+bulk_write (so every update uses the _id index, not a scan per title). It is
+resumable: finished entries no longer match the filter, and the last
+processed _id is printed after each batch so --after can skip ahead.
+"""
+import argparse
+from bson.objectid import ObjectId
+from pymongo import UpdateMany
+from db import user_items_collection
+from tmdb import content_metadata, fetch_details, get_executor
+
+MISSING_METADATA = {"poster_path": {"$exists": False}}
+
+def build_updates(keys):
+    """Resolve metadata for a batch of {title key: [entry _ids]} and return the bulk_write operations"""
+    details = get_executor().map(lambda key: fetch_details(*key), keys)
+    operations = []
+    for (media_type, item_id), item in zip(keys, details):
+        if not item:
+            continue  # TMDB failure or unknown id; a later run retries it
+        operations.append(UpdateMany(
+            {"_id": {"$in": keys[(media_type, item_id)]}, **MISSING_METADATA},
+            {"$set": content_metadata(item, media_type)}
+        ))
+    return operations
+
+def backfill(batch_size=200, after=None):
+    query = dict(MISSING_METADATA)
+    if after:
+        query["_id"] = {"$gt": ObjectId(after)}
+
+    cursor = user_items_collection.find(query, {"type": 1, "id": 1}).sort("_id", 1).batch_size(batch_size)
+
+    keys, last_id, updated = {}, None, 0
+    for entry in cursor:
+        keys.setdefault((entry["type"], entry["id"]), []).append(entry["_id"])
+        last_id = entry["_id"]
+        if len(keys) >= batch_size:
+            updated += flush(keys, last_id)
+            keys = {}
+    if keys:
+        updated += flush(keys, last_id)
+    print(f"Done, {updated} titles updated")
+
+def flush(keys, last_id):
+    operations = build_updates(keys)
+    if operations:
+        user_items_collection.bulk_write(operations, ordered=False)
+    print(f"Processed {len(keys)} titles ({len(operations)} resolved), last _id {last_id}")
+    return len(operations)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--after", help="Resume after this user_items _id")
+    args = parser.parse_args()
+    backfill(args.batch_size, args.after)
@@ -0,0 +1,22 @@
+"""Rebuild the taste vector from history for users created before it existed.
+
+Usage: python -m scripts.backfill_taste
+
+Explore does this lazily the first time such a user's taste profile is read
+(users.taste_initialized marks it done); running this after deploying does
+it up front so no page view pays for the rebuild.
+"""
+import argparse
+from db import users_collection, initialize_taste_profile
+
+def backfill():
+    usernames = [
+        user["username"]
+        for user in users_collection.find({"taste_initialized": {"$ne": True}}, {"username": 1})
+    ]
+    rebuilt = sum(1 for username in usernames if initialize_taste_profile(username))
+    print(f"Done, {rebuilt} of {len(usernames)} taste profiles rebuilt")
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description=__doc__.splitlines()[0]).parse_args()
+    backfill()
@@ -0,0 +1,125 @@
+"""Latency check for the details loader against a local fake TMDB server.
+
+Usage: python -m scripts.bench_details [--titles 50] [--latency-ms 80] [--budget-ms 250]
+
+Starts a threaded HTTP server that answers /movie/<id> and /tv/<id> (with
+any append_to_response sections) after --latency-ms, points TMDB_BASE_URL
+and a throwaway TMDB_CACHE_DIR at it, then loads --titles titles through
+catalog.fetch_item cold and again warm. Exits 1 unless every cold load took
+exactly one upstream request, cold p95 stays under --budget-ms and warm loads
+never reach the server. MongoDB is not needed: only the TMDB path is exercised.
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+REQUESTS = []
+LATENCY = 0.08
+
+def fake_details(media_type, tmdb_id, appends):
+    title_field = "title" if media_type == "movie" else "name"
+    date_field = "release_date" if media_type == "movie" else "first_air_date"
+    details = {
+        "id": tmdb_id,
+        title_field: f"Title {tmdb_id}",
+        date_field: "2020-01-01",
+        "overview": "A fake title served by bench_details.",
+        "poster_path": f"/poster{tmdb_id}.jpg",
+        "genres": [{"id": 18, "name": "Drama"}],
+        "vote_average": 7.5,
+        "popularity": 10.0,
+    }
+    sections = {
+        "watch/providers": {"results": {"US": {"flatrate": [{"provider_name": "Fake", "logo_path": "/l.png"}]}}},
+        "external_ids": {"imdb_id": f"tt{tmdb_id:07d}"},
+        "credits": {
+            "cast": [{"name": f"Actor {i}", "character": f"Role {i}", "profile_path": None} for i in range(20)],
+            "crew": [{"name": "A Director", "job": "Director"}]
+        },
+        "similar": {"results": [{"id": tmdb_id + i, title_field: f"Similar {i}", "poster_path": None} for i in range(20)]},
+    }
+    details.update({name: sections[name] for name in appends if name in sections})
+    return details
+
+class FakeTMDB(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        REQUESTS.append(url.path)
+        time.sleep(LATENCY)
+        parts = url.path.strip("/").split("/")  # ["3", media_type, id]
+        if len(parts) != 3 or parts[1] not in ("movie", "tv") or not parts[2].isdigit():
+            self.send_response(404)
+            self.end_headers()
+            return
+        appends = parse_qs(url.query).get("append_to_response", [""])[0].split(",")
+        body = json.dumps(fake_details(parts[1], int(parts[2]), appends)).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+def main():
+    global LATENCY
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--titles", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--budget-ms", type=float, default=250)
+    args = parser.parse_args()
+    LATENCY = args.latency_ms / 1000
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeTMDB)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["TMDB_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/3"
+    os.environ["TMDB_CACHE_DIR"] = tempfile.mkdtemp(prefix="bench_details_")
+    os.environ.setdefault("TMDB_API_KEY", "bench")
+    from catalog import fetch_item  # Imported after the environment points at the fake server
+
+    keys = [("movie" if i % 2 else "tv", 1000 + i) for i in range(args.titles)]
+    failures = []
+
+    def load_all():
+        timings = []
+        for media_type, tmdb_id in keys:
+            started = time.perf_counter()
+            item = fetch_item(media_type, tmdb_id)
+            timings.append((time.perf_counter() - started) * 1000)
+            if not item or not item["cast"] or not item["similar"] or not item["providers"]:
+                failures.append(f"incomplete item {media_type}:{tmdb_id}")
+        return timings
+
+    cold = load_all()
+    cold_requests = len(REQUESTS)
+    warm = load_all()
+    warm_requests = len(REQUESTS) - cold_requests
+    server.shutdown()
+
+    print(f"cold: {cold_requests} requests for {len(keys)} titles, p50 {percentile(cold, 0.5):.1f} ms, p95 {percentile(cold, 0.95):.1f} ms")
+    print(f"warm: {warm_requests} requests, p50 {percentile(warm, 0.5):.2f} ms, p95 {percentile(warm, 0.95):.2f} ms")
+
+    if cold_requests != len(keys):
+        failures.append(f"expected one request per title, got {cold_requests} for {len(keys)}")
+    if percentile(cold, 0.95) > args.budget_ms:
+        failures.append(f"cold p95 over budget ({args.budget_ms} ms)")
+    if warm_requests:
+        failures.append(f"{warm_requests} warm loads reached the server")
+    if failures:
+        print("FAILED:\n  " + "\n  ".join(failures[:10]))
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
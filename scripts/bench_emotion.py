@@ -0,0 +1,71 @@
+"""Compare emotion model backends: load time, latency and batched throughput.
+
+Usage: python -m scripts.bench_emotion [--backends onnx,quantized,torch] [--requests 500] [--sessions 16]
+
+For each backend this loads the model, classifies every sample once in a
+single thread (per-query latency, cache disabled), then replays the samples
+from --sessions threads at once so the micro-batcher can group them.
+Backends that fail to load (e.g. optimum not installed) are reported and skipped.
+"""
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import metrics
+from emotion_model import EmotionModel, BACKENDS, LOADERS
+
+SAMPLES = [
+    "I had a wonderful day at the beach with my friends",
+    "I'm so tired and everything feels pointless",
+    "Why does nobody ever listen to me, this is infuriating",
+    "I heard a noise downstairs and I'm scared to check",
+    "Wow, I did not expect that at all!",
+    "Just a normal day, nothing special",
+    "Мне сегодня очень грустно",
+    "Я так рад тебя видеть",
+]
+
+def run(backend, requests, sessions):
+    if backend not in LOADERS:
+        print(f"{backend:<10} unknown backend")
+        return
+    metrics.reset()
+    try:
+        model = EmotionModel(backend, cache_size=0)
+    except RuntimeError as e:
+        print(f"{backend:<10} failed to load: {e}")
+        return
+    if model.backend != backend:
+        print(f"{backend:<10} unavailable (fell back to {model.backend}), skipped")
+        return
+    texts = [f"{SAMPLES[i % len(SAMPLES)]} #{i}" for i in range(requests)]
+
+    for text in texts[:sessions]:
+        model.classify(text)  # Warm up
+    metrics.reset()
+
+    for text in texts:
+        model.classify(text)
+    single = metrics.snapshot()["timings"]["emotion.latency_ms"]
+
+    metrics.reset()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        list(pool.map(model.classify, texts))
+    elapsed = time.perf_counter() - started
+    timings = metrics.snapshot()["timings"]
+
+    print(
+        f"{backend:<10} load {model.load_seconds:6.2f}s  "
+        f"single p50 {single['p50']:6.1f}ms p95 {single['p95']:6.1f}ms  "
+        f"concurrent {requests / elapsed:7.1f} req/s p95 {timings['emotion.latency_ms']['p95']:6.1f}ms "
+        f"mean batch {timings['emotion.batch_size']['mean']:4.1f}"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--sessions", type=int, default=16)
+    args = parser.parse_args()
+    for backend in args.backends.split(","):
+        run(backend, args.requests, args.sessions)
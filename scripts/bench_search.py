@@ -0,0 +1,75 @@
+"""Benchmark the SQLite FTS5 search index at catalog sizes of 100k and 1M titles.
+
+Usage: python -m scripts.bench_search [--sizes 100000,1000000] [--queries 500]
+
+For each size, builds a throwaway index of synthetic titles (words drawn
+from a Zipf-like vocabulary, random popularity), then times search_index.search
+for single-word prefixes, multi-word queries and rare words. Prints build time
+and query p50/p95/max in milliseconds. Needs no MongoDB or TMDB.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+WORDS = [
+    "the", "dark", "knight", "star", "war", "love", "night", "city", "last", "king",
+    "dragon", "house", "secret", "man", "woman", "girl", "boy", "lost", "world", "time",
+    "blood", "shadow", "return", "rise", "fall", "game", "life", "death", "day", "dream",
+    "heart", "fire", "ice", "sea", "island", "mountain", "river", "ghost", "crown", "empire",
+] + [f"word{i}" for i in range(5000)]  # Long tail of rare words
+
+def synthetic(i):
+    words = [random.choice(WORDS[:40]) if random.random() < 0.7 else random.choice(WORDS) for _ in range(random.randint(1, 4))]
+    title = " ".join(words).title()
+    return {
+        "id": i,
+        "media_type": "movie" if i % 3 else "tv",
+        "title": title,
+        "original_title": title,
+        "overview": " ".join(random.choice(WORDS) for _ in range(25)),
+        "poster_path": None,
+        "genre_ids": [random.randint(1, 20)],
+        "vote_average": round(random.uniform(1, 10), 1),
+        "popularity": random.expovariate(0.05),
+        "release_date": f"{random.randint(1950, 2025)}-01-01"
+    }
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+def bench(size, queries):
+    os.environ["SEARCH_INDEX_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench_search_"), "index.sqlite3")
+    sys.modules.pop("search_index", None)  # Fresh module so it opens the new path
+    import search_index
+
+    started = time.perf_counter()
+    for offset in range(0, size, 10000):
+        search_index.add([synthetic(i) for i in range(offset, min(offset + 10000, size))])
+    build = time.perf_counter() - started
+
+    workloads = {
+        "prefix": [random.choice(WORDS[:40])[:3] for _ in range(queries)],
+        "two words": [f"{random.choice(WORDS[:40])} {random.choice(WORDS[:40])[:2]}" for _ in range(queries)],
+        "rare word": [random.choice(WORDS[40:]) for _ in range(queries)],
+    }
+    print(f"{size:>9,} titles  built in {build:6.1f}s")
+    for name, texts in workloads.items():
+        timings = []
+        for text in texts:
+            t = time.perf_counter()
+            search_index.search(text, limit=20)
+            timings.append((time.perf_counter() - t) * 1000)
+        print(f"    {name:<10} p50 {percentile(timings, 0.5):7.2f} ms  p95 {percentile(timings, 0.95):7.2f} ms  max {max(timings):7.2f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100000,1000000")
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+    random.seed(42)
+    for size in args.sizes.split(","):
+        bench(int(size), args.queries)
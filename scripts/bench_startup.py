@@ -0,0 +1,92 @@
+"""Measure cold-start import time of app.py and every page against a budget.
+
+Usage: python -m scripts.bench_startup [--repeats 3] [--budget-ms 2000] [--top 5]
+
+For each script, the top-level import statements are read from its AST and
+run in a fresh interpreter with -X importtime (the page body itself, which
+needs a Streamlit runtime, is not executed). The best of --repeats runs,
+minus bare interpreter startup, is compared with the script's budget, and
+the slowest top-level modules are listed. Exits 1 if any script is over
+budget or fails to import.
+"""
+import os
+import ast
+import sys
+import glob
+import time
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET_MS = 2000
+# Per-script overrides; everything else gets the default
+BUDGETS_MS = {
+    "app.py": 1500,
+}
+
+def script_imports(path):
+    """Source of the module-level import statements in a script"""
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    return [
+        ast.get_source_segment(source, node)
+        for node in ast.parse(source).body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    ]
+
+def run(code):
+    """Run code in a fresh interpreter; returns (wall ms, importtime stderr, return code)"""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    return (time.perf_counter() - started) * 1000, result.stderr, result.returncode
+
+def slowest_modules(stderr, top):
+    """Top-level modules by cumulative import time (µs) from -X importtime output"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):  # Top-level import, not a dependency of one
+            modules.append((int(cumulative), name.strip()))
+    return sorted(modules, reverse=True)[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--budget-ms", type=int, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    baseline = min(run("pass")[0] for _ in range(args.repeats))
+    scripts = ["app.py"] + sorted(os.path.relpath(p, ROOT) for p in glob.glob(os.path.join(ROOT, "pages", "*.py")))
+    failures = []
+
+    for script in scripts:
+        code = "\n".join(script_imports(os.path.join(ROOT, script)))
+        runs = [run(code) for _ in range(args.repeats)]
+        elapsed, stderr, returncode = min(runs)
+        if returncode != 0:
+            failures.append(script)
+            print(f"{script:<28} FAILED to import:\n{stderr.splitlines()[-1] if stderr else ''}")
+            continue
+
+        cost = elapsed - baseline
+        budget = BUDGETS_MS.get(script, args.budget_ms)
+        status = "OK" if cost <= budget else "OVER"
+        if cost > budget:
+            failures.append(script)
+        print(f"{script:<28} {cost:7.0f} ms / {budget} ms  {status}")
+        for cumulative, name in slowest_modules(stderr, args.top):
+            print(f"    {cumulative / 1000:7.1f} ms  {name}")
+
+    print(f"Interpreter startup {baseline:.0f} ms (subtracted)")
+    if failures:
+        print(f"{len(failures)} of {len(scripts)} scripts failed or went over budget: {', '.join(failures)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Fail if any public db.py query is planned as a collection scan.
+
+Usage: MONGO_URI=mongodb://localhost:27017 python -m scripts.check_query_plans
+
+Creates the indexes with db.ensure_indexes(), then runs explain() for the
+filter/sort shape of every public query in db.py and exits non-zero if
+any winning plan contains a COLLSCAN stage. Point MONGO_URI at a local
+mongod; it only reads plans and creates indexes.
+"""
+import sys
+from datetime import datetime
+from bson.objectid import ObjectId
+import db
+
+USER = "plan-check-user"
+FRIENDS = ["plan-check-friend-1", "plan-check-friend-2"]
+
+# (name, collection, filter, sort) mirroring each db.py read and write filter
+QUERIES = [
+    ("login_user / get_user_data / get_friends", db.users_collection, {"username": USER}, None),
+    ("get_user_items / iter_user_items / get_user_item_keys", db.user_items_collection,
+        {"username": USER, "list": "watched"}, [("added_at", -1), ("_id", -1)]),
+    ("get_user_items (next page)", db.user_items_collection, {"username": USER, "list": "watched", "$or": [
+        {"added_at": {"$lt": datetime.utcnow()}},
+        {"added_at": datetime.utcnow(), "_id": {"$lt": ObjectId()}}
+    ]}, [("added_at", -1), ("_id", -1)]),
+    ("add_watched_content / add_liked_content", db.user_items_collection,
+        {"username": USER, "list": "watched", "type": "movie", "id": 1}, None),
+    ("remove_content", db.user_items_collection,
+        {"username": USER, "list": "watched", "type": "movie", "id": 1}, None),
+    ("get_friend_requests", db.friend_requests_collection, {"$or": [
+        {"to_user": USER, "status": "pending"},
+        {"from_user": USER, "status": "pending"}
+    ]}, None),
+    ("send_friend_request", db.friend_requests_collection,
+        {"from_user": USER, "to_user": FRIENDS[0], "status": "pending"}, None),
+    ("respond_friend_request", db.friend_requests_collection, {"_id": ObjectId(), "status": "pending"}, None),
+    ("get_recommendations", db.recommendations_collection,
+        {"to_user": USER, "status": "active"}, [("created_at", 1)]),
+    ("remove_recommendation", db.recommendations_collection,
+        {"_id": ObjectId(), "status": {"$ne": "removed"}}, None),
+    ("get_friends_activity", db.activity_collection,
+        {"actor": {"$in": FRIENDS}, "verb": "watched"}, [("created_at", -1)]),
+    ("remove_content (activity)", db.activity_collection,
+        {"actor": USER, "verb": "watched", "type": "movie", "id": 1}, None),
+    ("get_items", db.items_collection, {"_id": {"$in": ["movie:1", "tv:2"]}}, None),
+    ("iter_catalog_titles (since)", db.items_collection, {"refreshed_at": {"$gt": datetime.utcnow()}}, None),
+]
+
+AGGREGATIONS = [
+    ("get_popular_with_friends", db.user_items_collection, [
+        {"$match": {"username": {"$in": FRIENDS}, "list": "watched"}},
+        {"$group": {"_id": {"type": "$type", "id": "$id"}, "watch_count": {"$sum": 1}}}
+    ]),
+]
+
+def collscans(plan):
+    """Yield every COLLSCAN stage found anywhere in an explain document"""
+    if isinstance(plan, dict):
+        if plan.get("stage") == "COLLSCAN":
+            yield plan
+        for value in plan.values():
+            yield from collscans(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from collscans(value)
+
+def winning_plan(explain):
+    """Strip rejected plans so only the chosen plan is inspected"""
+    if isinstance(explain, dict):
+        return {k: winning_plan(v) for k, v in explain.items() if k != "rejectedPlans"}
+    if isinstance(explain, list):
+        return [winning_plan(v) for v in explain]
+    return explain
+
+def main():
+    db.ensure_indexes()
+    failures = []
+
+    for name, collection, query, sort in QUERIES:
+        cursor = collection.find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        if any(collscans(winning_plan(cursor.explain()))):
+            failures.append(name)
+
+    for name, collection, pipeline in AGGREGATIONS:
+        explain = db.db.command("aggregate", collection.name, pipeline=pipeline, explain=True)
+        if any(collscans(winning_plan(explain))):
+            failures.append(name)
+
+    checked = len(QUERIES) + len(AGGREGATIONS)
+    if failures:
+        print(f"COLLSCAN in {len(failures)} of {checked} queries:")
+        for name in failures:
+            print(f"  - {name}")
+        sys.exit(1)
+    print(f"OK, {checked} queries use indexes")
+
+if __name__ == "__main__":
+    main()
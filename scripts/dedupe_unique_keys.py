@@ -0,0 +1,50 @@
+"""Remove duplicates that block the unique indexes created by ensure_indexes.
+
+Usage: python -m scripts.dedupe_unique_keys [--dry-run]
+
+Before usernames, pending friend requests and user_items were protected by
+unique indexes, concurrent clicks could insert the same document twice, and
+ensure_indexes then can't build the index. This keeps one document per key
+(the first user account, the oldest pending request, the most recently
+added list entry), deletes the rest and rebuilds the indexes.
+"""
+import argparse
+from db import get_database, ensure_indexes
+
+# collection -> (filter, key fields, sort picking the document to keep first)
+UNIQUE_KEYS = {
+    "users": ({}, ("username",), {"_id": 1}),
+    "friend_requests": ({"status": "pending"}, ("from_user", "to_user"), {"_id": 1}),
+    "user_items": ({}, ("username", "list", "type", "id"), {"added_at": -1, "_id": -1})
+}
+
+def find_duplicates(collection, match, fields, keep_first):
+    """Yield (key, [_ids to delete]) for every key held by more than one document"""
+    return (
+        (group["_id"], group["ids"][1:])
+        for group in collection.aggregate([
+            {"$match": match},
+            {"$sort": keep_first},
+            {"$group": {"_id": {field: f"${field}" for field in fields}, "ids": {"$push": "$_id"}}},
+            {"$match": {"ids.1": {"$exists": True}}}
+        ], allowDiskUse=True)
+    )
+
+def dedupe(dry_run=False):
+    db = get_database()
+    for name, (match, fields, keep_first) in UNIQUE_KEYS.items():
+        deleted = 0
+        for key, ids in find_duplicates(db[name], match, fields, keep_first):
+            print(f"{name}: {key} has {len(ids)} duplicate(s)")
+            if not dry_run:
+                deleted += db[name].delete_many({"_id": {"$in": ids}}).deleted_count
+        print(f"{name}: {deleted} duplicates deleted")
+    if not dry_run:
+        ensure_indexes()
+        print("Done, indexes created")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="Only list duplicates")
+    args = parser.parse_args()
+    dedupe(args.dry_run)
@@ -0,0 +1,28 @@
+"""Export a user's watched, liked, friends and recommendations to NDJSON or CSV.
+
+Usage: python -m scripts.export_history <username> [-o out.ndjson] [--format ndjson|csv] [--sections watched,liked] [--batch-size 1000]
+
+Records are read from Mongo cursors batch by batch and written as they
+arrive, so memory use stays flat however long the history is. Writes to
+stdout when no output file is given.
+"""
+import sys
+import argparse
+from exporter import export_history, SECTIONS, FORMATS, BATCH_SIZE
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("username")
+    parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    parser.add_argument("--format", default="ndjson", choices=FORMATS)
+    parser.add_argument("--sections", default=",".join(SECTIONS))
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+    sections = [section for section in args.sections.split(",") if section in SECTIONS]
+
+    if args.output:
+        with open(args.output, "wb") as out:
+            count = export_history(args.username, out, args.format, sections, args.batch_size)
+    else:
+        count = export_history(args.username, sys.stdout.buffer, args.format, sections, args.batch_size)
+    print(f"Exported {count} records", file=sys.stderr)
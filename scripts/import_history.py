@@ -0,0 +1,27 @@
+"""Import a Letterboxd, IMDb or Trakt export into a user's watched/liked list.
+
+Usage: python -m scripts.import_history <username> <export file> [--list watched|liked] [--chunk-size 500]
+
+The file is parsed as a stream (CSV rows or JSON array items one at a
+time), titles are resolved to TMDB ids in parallel through the cached
+client and each chunk is written with one bulk_write. Re-running the same
+file is safe: entries are upserts and existing titles are not counted again.
+"""
+import argparse
+from db import ensure_indexes
+from importer import import_history, CHUNK_SIZE
+
+def report(stats):
+    print(f"Read {stats['read']} entries, {stats['imported']} added, {stats['unresolved']} unresolved, {stats['skipped']} skipped")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("username")
+    parser.add_argument("path")
+    parser.add_argument("--list", default="watched", choices=["watched", "liked"])
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+    ensure_indexes()
+    with open(args.path, "rb") as f:
+        stats = import_history(args.username, f, args.list, args.chunk_size, progress=report)
+    print(f"Done, {stats['imported']} titles added to {args.username}'s {args.list} list")
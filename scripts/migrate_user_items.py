@@ -0,0 +1,68 @@
+"""Move embedded watched/liked arrays out of users into user_items.
+
+Usage: python -m scripts.migrate_user_items [--batch-size 500] [--keep-arrays]
+
+Each array entry becomes one user_items document keyed by
+(username, list, type, id); ISO-string added_at values become datetimes.
+Writes are idempotent upserts in chunked bulk_write calls, and a user's
+arrays are unset once their entries are written, so an interrupted run can
+simply be restarted. --keep-arrays leaves the arrays in place (dry rollout).
+"""
+import argparse
+from datetime import datetime
+from pymongo import UpdateOne
+from db import users_collection, user_items_collection, ensure_indexes, CONTENT_LISTS
+
+def parse_added_at(value):
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return datetime(1970, 1, 1)  # Unknown dates sort last
+
+def user_operations(user):
+    for list_name in CONTENT_LISTS:
+        for entry in user.get(list_name, []):
+            fields = {k: v for k, v in entry.items() if k not in ("id", "type")}
+            fields["added_at"] = parse_added_at(entry.get("added_at"))
+            # Duplicated array entries collapse into one document, newest date wins
+            yield UpdateOne(
+                {"username": user["username"], "list": list_name, "type": entry["type"], "id": entry["id"]},
+                {"$max": {"added_at": fields.pop("added_at")}, "$set": fields},
+                upsert=True
+            )
+
+def migrate(batch_size=500, keep_arrays=False):
+    ensure_indexes()
+    query = {"$or": [{list_name: {"$exists": True}} for list_name in CONTENT_LISTS]}
+    projection = {"username": 1, **{list_name: 1 for list_name in CONTENT_LISTS}}
+
+    operations, done_users, migrated = [], [], 0
+    for user in users_collection.find(query, projection).batch_size(50):
+        operations.extend(user_operations(user))
+        done_users.append(user["_id"])
+        if len(operations) >= batch_size:
+            migrated += flush(operations, done_users, keep_arrays)
+            operations, done_users = [], []
+    if operations or done_users:
+        migrated += flush(operations, done_users, keep_arrays)
+    print(f"Done, {migrated} entries migrated")
+
+def flush(operations, user_ids, keep_arrays):
+    if operations:
+        user_items_collection.bulk_write(operations, ordered=False)
+    if not keep_arrays:
+        users_collection.update_many(
+            {"_id": {"$in": user_ids}},
+            {"$unset": {list_name: "" for list_name in CONTENT_LISTS}}
+        )
+    print(f"Migrated {len(operations)} entries for {len(user_ids)} users")
+    return len(operations)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--keep-arrays", action="store_true")
+    args = parser.parse_args()
+    migrate(args.batch_size, args.keep_arrays)
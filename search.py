@@ -0,0 +1,203 @@
+import os
+import time
+import bisect
+import threading
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime
+from db import iter_catalog_titles
+from tmdb import search as tmdb_search
+import search_index
+
+# Search Configuration
+MIN_QUERY_LENGTH = 2
+MIN_LOCAL_MATCHES = 5  # Fewer local matches than this goes to TMDB
+OFFLINE = os.getenv("SEARCH_OFFLINE") == "1"  # Serve from the local indexes only
+QUERY_TTL = 10 * 60
+QUERY_CACHE_SIZE = 2000
+INDEX_REFRESH = 10 * 60  # Seconds between catalog reloads into the index
+MAX_SCAN = 2000  # Prefixes matching more index entries than this are ranked once and cached
+TOP_K = 50  # Titles kept per cached prefix ranking (at least any search limit)
+
+# Sorted index of (normalized suffix of a title, key); every word start of a
+# title is an entry, so "knight" finds "The Dark Knight". Results are shaped
+# like TMDB search results so pages can render either interchangeably
+_index = []
+_titles = {}  # (media_type, id) -> result dict
+_top = {}  # (media_type, prefix) -> keys of the TOP_K most popular matches, for prefixes over MAX_SCAN
+_index_lock = threading.Lock()
+_indexed_at = None  # When the catalog was last loaded (UTC)
+_index_thread = None
+
+_queries = OrderedDict()  # (media_type, normalized query) -> (expires_at, results)
+_queries_lock = threading.Lock()
+
+def normalize(text):
+    """Lower case, accents stripped, whitespace collapsed"""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.lower().split())
+
+def _result(media_type, tmdb_id, title, release_date, **fields):
+    result = {"id": tmdb_id, "media_type": media_type, **fields}
+    result["title" if media_type == "movie" else "name"] = title
+    result["release_date" if media_type == "movie" else "first_air_date"] = release_date or ""
+    return result
+
+def _index_entries(result, *titles):
+    key = (result["media_type"], result["id"])
+    for title in set(normalize(t) for t in titles if t):
+        words = title.split(" ")
+        for i in range(len(words)):
+            yield (" ".join(words[i:]), key)
+
+def _add(results, bulk=False):
+    """Add (TMDB-shaped result, alternate title) pairs to the index (caller holds _index_lock)"""
+    # bulk=True is for catalog loads: one sort of the whole index beats many insorts
+    # there, at the cost of re-ranking cached prefixes. Small batches (a remote search's
+    # results) are inserted in place and only update the cached prefixes they match
+    entries = []
+    for result, alternate_title in results:
+        key = (result["media_type"], result["id"])
+        if key in _titles:
+            _titles[key].update(result)  # Fresher fields; the index entries stay valid
+            continue
+        _titles[key] = result
+        entries.extend(_index_entries(result, result.get("title") or result.get("name"), alternate_title))
+    if not entries:
+        return
+    if bulk:
+        _index.extend(entries)
+        _index.sort()
+        _top.clear()  # Re-ranked lazily on the next query for each prefix
+    else:
+        for entry in entries:
+            bisect.insort(_index, entry)
+            _rank_into_top(entry)
+
+def _popularity(key):
+    return _titles[key].get("popularity") or 0
+
+def _ranked(entries, media_type):
+    """Distinct keys of index entries, most popular first, at most TOP_K"""
+    keys = {key for _, key in entries if media_type in ("multi", key[0])}
+    return sorted(keys, key=_popularity, reverse=True)[:TOP_K]
+
+def _rank_into_top(entry):
+    """Add a new index entry to every cached ranking of a prefix it starts with"""
+    text, key = entry
+    for end in range(1, len(text) + 1):
+        for media_type in ("multi", key[0]):
+            keys = _top.get((media_type, text[:end]))
+            if keys is not None and key not in keys:
+                keys.append(key)
+                keys.sort(key=_popularity, reverse=True)
+                del keys[TOP_K:]
+
+def _load_catalog(batch_size=1000):
+    """Add catalog items refreshed since the last load to the index"""
+    global _indexed_at
+    started = datetime.utcnow()
+    batch = []
+    for item in iter_catalog_titles(since=_indexed_at):
+        batch.append((_result(
+            item["media_type"], item["tmdb_id"], item.get("title"), item.get("release_date"),
+            poster_path=item.get("poster_path"),
+            genre_ids=item.get("genre_ids", []),
+            vote_average=item.get("vote_average"),
+            popularity=item.get("popularity") or 0
+        ), item.get("original_title")))
+        if len(batch) >= batch_size:
+            _add_batch(batch)
+            batch = []
+    _add_batch(batch)
+    _indexed_at = started  # Only once everything was loaded, so a failed load is retried in full
+
+def _add_batch(batch):
+    with _index_lock:
+        _add(batch, bulk=True)
+
+def _refresh_index():
+    while True:
+        try:
+            _load_catalog()
+            search_index.sync()
+        except Exception as e:
+            print("Search index error:", e)
+        time.sleep(INDEX_REFRESH)
+
+def _start():
+    global _index_thread
+    if _index_thread is None:
+        with _index_lock:
+            if _index_thread is None:
+                _index_thread = threading.Thread(target=_refresh_index, name="search-index", daemon=True)
+                _index_thread.start()
+
+def prefix_matches(query, media_type="multi", limit=10):
+    """Titles with a word starting with query, most popular first (local only)"""
+    _start()
+    prefix = normalize(query)
+    if not prefix:
+        return []
+    with _index_lock:
+        start = bisect.bisect_left(_index, (prefix,))
+        end = bisect.bisect_left(_index, (prefix + "\uffff",), start)
+        if end - start <= MAX_SCAN:
+            keys = _ranked(_index[start:end], media_type)
+        else:
+            # Short or common prefixes ("t", "the") match too many entries to rank
+            # on every keystroke, so their ranking over the whole range is cached
+            keys = _top.get((media_type, prefix))
+            if keys is None:
+                keys = _top[(media_type, prefix)] = _ranked(_index[start:end], media_type)
+            keys = sorted(keys, key=_popularity, reverse=True)  # Popularity may have been refreshed
+        return [_titles[key] for key in keys[:limit]]
+
+def _cached(cache_key):
+    with _queries_lock:
+        entry = _queries.get(cache_key)
+        if entry and entry[0] > time.time():
+            _queries.move_to_end(cache_key)
+            return entry[1]
+    return None
+
+def _remember(cache_key, results):
+    with _queries_lock:
+        _queries[cache_key] = (time.time() + QUERY_TTL, results)
+        _queries.move_to_end(cache_key)
+        while len(_queries) > QUERY_CACHE_SIZE:
+            _queries.popitem(last=False)
+
+def _merge(results, more):
+    seen = {(r["media_type"], r["id"]) for r in results}
+    return results + [r for r in more if (r["media_type"], r["id"]) not in seen]
+
+def search_titles(query, media_type="multi", limit=20):
+    """Search movies/tv: query cache, local prefix index, local full-text index, then TMDB"""
+    normalized = normalize(query)
+    if len(normalized) < MIN_QUERY_LENGTH:
+        return []
+    cache_key = (media_type, normalized)
+    cached = _cached(cache_key)
+    if cached is not None:
+        return cached[:limit]
+
+    results = prefix_matches(normalized, media_type, limit)
+    if len(results) < MIN_LOCAL_MATCHES:
+        results = _merge(results, search_index.search(normalized, media_type, limit))
+    if len(results) < MIN_LOCAL_MATCHES and not OFFLINE:
+        remote = [
+            dict(item, media_type=item.get("media_type", media_type))
+            for item in tmdb_search(query, media_type)
+            if item.get("media_type", media_type) in ("movie", "tv")
+        ]
+        # Seen once, answered locally next time
+        with _index_lock:
+            _add([(result, result.get("original_title") or result.get("original_name")) for result in remote])
+        search_index.add(remote)
+        results = _merge(results, remote)
+
+    if results:  # An empty answer may just mean TMDB was unreachable; don't pin it
+        _remember(cache_key, results)
+    return results[:limit]
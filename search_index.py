@@ -0,0 +1,203 @@
+import os
+import re
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from tmdb_cache import CACHE_DIR
+
+# Search Index Configuration
+# A local SQLite FTS5 index over titles, original titles and overviews of every
+# title we have cached, so search keeps working when TMDB is slow or rate-limits us
+INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", os.path.join(CACHE_DIR, "search_index.sqlite3"))
+COLUMN_WEIGHTS = (10.0, 5.0, 1.0)  # bm25 weights for title, original_title, overview
+RANK_PRECISION = 1  # bm25 scores are rounded so popularity breaks near-ties
+CANDIDATES = 200  # Best bm25 matches re-ranked with the popularity tie-break
+SYNC_BATCH = 1000
+
+_local = threading.local()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS titles (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    media_type TEXT NOT NULL,
+    tmdb_id INTEGER NOT NULL,
+    title TEXT,
+    original_title TEXT,
+    overview TEXT,
+    poster_path TEXT,
+    genre_ids TEXT,
+    vote_average REAL,
+    popularity REAL NOT NULL DEFAULT 0,
+    release_date TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS titles_fts USING fts5(
+    title, original_title, overview,
+    content='titles', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS titles_ai AFTER INSERT ON titles BEGIN
+    INSERT INTO titles_fts (rowid, title, original_title, overview)
+    VALUES (new.id, new.title, new.original_title, new.overview);
+END;
+CREATE TRIGGER IF NOT EXISTS titles_ad AFTER DELETE ON titles BEGIN
+    INSERT INTO titles_fts (titles_fts, rowid, title, original_title, overview)
+    VALUES ('delete', old.id, old.title, old.original_title, old.overview);
+END;
+CREATE TRIGGER IF NOT EXISTS titles_au AFTER UPDATE ON titles BEGIN
+    INSERT INTO titles_fts (titles_fts, rowid, title, original_title, overview)
+    VALUES ('delete', old.id, old.title, old.original_title, old.overview);
+    INSERT INTO titles_fts (rowid, title, original_title, overview)
+    VALUES (new.id, new.title, new.original_title, new.overview);
+END;
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+"""
+
+def _connect():
+    """Return this thread's SQLite connection, creating the schema on first use"""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        os.makedirs(os.path.dirname(INDEX_PATH), exist_ok=True)
+        conn = sqlite3.connect(INDEX_PATH, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        _local.conn = conn
+    return conn
+
+def _row(result):
+    """Table row from a TMDB-shaped result (search result or details payload)"""
+    media_type = result["media_type"]
+    return (
+        f"{media_type}:{result['id']}",
+        media_type,
+        result["id"],
+        result.get("title") or result.get("name"),
+        result.get("original_title") or result.get("original_name"),
+        result.get("overview"),
+        result.get("poster_path"),
+        json.dumps(result.get("genre_ids") or [g["id"] for g in result.get("genres", [])]),
+        result.get("vote_average"),
+        result.get("popularity") or 0,
+        result.get("release_date") or result.get("first_air_date") or ""
+    )
+
+def from_catalog(item):
+    """TMDB-shaped result from a catalog document (catalog.normalize_item)"""
+    return {
+        "id": item["tmdb_id"],
+        "media_type": item["media_type"],
+        "title": item.get("title"),
+        "original_title": item.get("original_title"),
+        "overview": item.get("overview"),
+        "poster_path": item.get("poster_path"),
+        "genre_ids": item.get("genre_ids", []),
+        "vote_average": item.get("vote_average"),
+        "popularity": item.get("popularity"),
+        "release_date": item.get("release_date")
+    }
+
+def add(results):
+    """Insert or update TMDB-shaped results; the FTS table follows via triggers"""
+    rows = [_row(result) for result in results if result.get("media_type") in ("movie", "tv")]
+    if not rows:
+        return
+    try:
+        conn = _connect()
+        with conn:
+            conn.executemany("""
+                INSERT INTO titles (key, media_type, tmdb_id, title, original_title, overview,
+                                    poster_path, genre_ids, vote_average, popularity, release_date)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    title = excluded.title,
+                    original_title = excluded.original_title,
+                    overview = COALESCE(excluded.overview, titles.overview),
+                    poster_path = excluded.poster_path,
+                    genre_ids = excluded.genre_ids,
+                    vote_average = excluded.vote_average,
+                    popularity = excluded.popularity,
+                    release_date = excluded.release_date
+            """, rows)
+    except sqlite3.Error as e:
+        print("Search index error:", e)
+
+def _match_expression(query):
+    """Every word of the query as a quoted prefix term, e.g. 'dark kni' -> '"dark"* "kni"*'"""
+    words = re.findall(r"\w+", query.lower())
+    return " ".join(f'"{word}"*' for word in words)
+
+def search(query, media_type="multi", limit=20):
+    """Ranked local matches (bm25 over title/original title/overview, popularity as tie-break)"""
+    expression = _match_expression(query)
+    if not expression:
+        return []
+    # Rank inside FTS first (no join per match), then join and tie-break the top candidates
+    sql = f"""
+        SELECT t.media_type, t.tmdb_id, t.title, t.original_title, t.overview, t.poster_path,
+               t.genre_ids, t.vote_average, t.popularity, t.release_date
+        FROM (
+            SELECT rowid, bm25(titles_fts, {", ".join(map(str, COLUMN_WEIGHTS))}) AS score
+            FROM titles_fts
+            WHERE titles_fts MATCH ?
+            ORDER BY score
+            LIMIT ?
+        ) AS matches
+        JOIN titles AS t ON t.id = matches.rowid
+        {"WHERE t.media_type = ?" if media_type != "multi" else ""}
+        ORDER BY ROUND(matches.score, {RANK_PRECISION}), t.popularity DESC
+        LIMIT ?
+    """
+    candidates = CANDIDATES if media_type == "multi" else CANDIDATES * 3
+    params = [expression, candidates] + ([media_type] if media_type != "multi" else []) + [limit]
+    try:
+        rows = _connect().execute(sql, params).fetchall()
+    except sqlite3.Error as e:
+        print("Search index error:", e)
+        return []
+
+    results = []
+    for media_type_, tmdb_id, title, original_title, overview, poster_path, genre_ids, vote_average, popularity, release_date in rows:
+        is_movie = media_type_ == "movie"
+        results.append({
+            "id": tmdb_id,
+            "media_type": media_type_,
+            "title" if is_movie else "name": title,
+            "original_title" if is_movie else "original_name": original_title,
+            "overview": overview,
+            "poster_path": poster_path,
+            "genre_ids": json.loads(genre_ids or "[]"),
+            "vote_average": vote_average,
+            "popularity": popularity,
+            "release_date" if is_movie else "first_air_date": release_date
+        })
+    return results
+
+def count():
+    return _connect().execute("SELECT COUNT(*) FROM titles").fetchone()[0]
+
+def sync():
+    """Copy catalog items refreshed since the last sync into the index; returns how many"""
+    from db import iter_catalog_titles  # Deferred so the index (and its benchmark) work without MongoDB
+    conn = _connect()
+    row = conn.execute("SELECT value FROM meta WHERE name = 'synced_at'").fetchone()
+    since = datetime.fromisoformat(row[0]) if row else None
+    started = datetime.utcnow()
+
+    synced, batch = 0, []
+    for item in iter_catalog_titles(since=since):
+        batch.append(from_catalog(item))
+        if len(batch) >= SYNC_BATCH:
+            add(batch)
+            synced += len(batch)
+            batch = []
+    add(batch)
+    synced += len(batch)
+
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (name, value) VALUES ('synced_at', ?)", (started.isoformat(),)
+        )
+    return synced
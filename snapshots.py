@@ -0,0 +1,75 @@
+import time
+import threading
+from collections import namedtuple
+from tmdb import tmdb_get, get_background_executor
+
+# Snapshot Configuration
+# name: (TMDB path, field holding the list, refresh interval in seconds)
+SNAPSHOTS = {
+    "popular/movie": ("/movie/popular", "results", 10 * 60),
+    "popular/tv": ("/tv/popular", "results", 10 * 60),
+    "trending/movie": ("/trending/movie/week", "results", 10 * 60),
+    "trending/tv": ("/trending/tv/week", "results", 10 * 60),
+    "genres/movie": ("/genre/movie/list", "genres", 24 * 60 * 60),
+    "genres/tv": ("/genre/tv/list", "genres", 24 * 60 * 60),
+}
+RETRY_AFTER = 60  # Seconds before retrying a failed refresh
+INITIAL_WAIT = 2.0  # Longest a first page view waits for the first refresh round
+
+# data is the last good list; stale is True when the latest refresh failed
+Snapshot = namedtuple("Snapshot", ["data", "fetched_at", "stale"])
+
+_snapshots = {}
+_lock = threading.Lock()
+_thread = None
+_ready = threading.Event()
+
+def get_snapshot(name):
+    """Return the in-memory Snapshot for name without ever calling TMDB"""
+    start()
+    return _snapshots.get(name, Snapshot([], None, True))
+
+def get(name):
+    return get_snapshot(name).data
+
+def refresh(name):
+    """Fetch one snapshot from TMDB; on failure keep the previous data, marked stale"""
+    path, field, _ = SNAPSHOTS[name]
+    data, stale = tmdb_get(path, refresh=True, with_stale=True)
+    with _lock:
+        previous = _snapshots.get(name, Snapshot([], None, True))
+        if data is None or field not in data:
+            _snapshots[name] = previous._replace(stale=True)
+            return False
+        if stale:  # Served from the expired disk cache, not by TMDB
+            _snapshots[name] = Snapshot(data[field], previous.fetched_at, True)
+            return False
+        _snapshots[name] = Snapshot(data[field], time.time(), False)
+        return True
+
+def _run():
+    next_due = {name: 0 for name in SNAPSHOTS}
+    while True:
+        now = time.time()
+        due = [name for name, at in next_due.items() if at <= now]
+        try:
+            for name, ok in zip(due, get_background_executor().map(refresh, due)):
+                next_due[name] = now + (SNAPSHOTS[name][2] if ok else RETRY_AFTER)
+        except Exception as e:
+            # Keep the thread alive; whatever didn't refresh is retried after RETRY_AFTER
+            print("Snapshot refresh error:", e)
+            for name in due:
+                next_due[name] = max(next_due[name], now + RETRY_AFTER)
+        _ready.set()
+        time.sleep(max(min(next_due.values()) - time.time(), 1))
+
+def start(wait=INITIAL_WAIT):
+    """Start the background refresher once per process; the first call waits briefly for data"""
+    global _thread
+    if _thread is None:
+        with _lock:
+            if _thread is not None:
+                return
+            _thread = threading.Thread(target=_run, name="snapshot-refresher", daemon=True)
+            _thread.start()
+        _ready.wait(wait)
@@ -0,0 +1,238 @@
+import os
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+import copy
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, Future
+import tmdb_cache
+import metrics
+from tmdb_limits import limiter, breaker
+
+# Load environment variables
+load_dotenv()
+TMDB_API_KEY = os.getenv("TMDB_API_KEY")
+
+# TMDB Configuration
+TMDB_BASE_URL = os.getenv("TMDB_BASE_URL", "https://api.themoviedb.org/3")
+TMDB_IMAGE_BASE_URL = "https://image.tmdb.org/t/p/w500"
+DEFAULT_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+POOL_SIZE = 32
+POSTER_WORKERS = 16
+BACKGROUND_WORKERS = 4  # Snapshot and candidate pool refreshes, kept off the page-serving pool
+MAX_RETRY_AFTER = 5  # A 429 asking us to wait longer than this fails fast (stale data is served)
+
+_session = None
+_session_lock = threading.Lock()
+_executor = None
+_background_executor = None
+_inflight = {}  # cache key -> Future of the request currently in flight
+_inflight_lock = threading.Lock()
+_budget = threading.local()  # Extra token bucket for this thread's upstream requests, see rate_budget
+
+# 🟢 Pooled HTTP Session
+def get_session():
+    """Return the process-wide TMDB session, creating it on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                # 429s are handled in _fetch so Retry-After pauses every thread, not just this one
+                retry = Retry(
+                    total=2,
+                    backoff_factor=0.5,
+                    status_forcelist=(500, 502, 503, 504),
+                    allowed_methods=("GET",),
+                    raise_on_status=False
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=4,
+                    pool_maxsize=POOL_SIZE,
+                    max_retries=retry
+                )
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+def tmdb_request(path, params=None, timeout=DEFAULT_TIMEOUT):
+    """Send a GET to a TMDB endpoint and return the raw response (may raise)"""
+    query = {"api_key": TMDB_API_KEY}
+    query.update(params or {})
+    return get_session().get(f"{TMDB_BASE_URL}{path}", params=query, timeout=timeout)
+
+def tmdb_get(path, params=None, timeout=DEFAULT_TIMEOUT, refresh=False, with_stale=False):
+    """GET a TMDB endpoint through the on-disk cache; returns parsed JSON or None"""
+    # refresh=True skips the cached copy (but still stores the new response).
+    # with_stale=True returns (data, stale) instead, stale being True when TMDB
+    # couldn't be reached (breaker open, throttled, errors) and an expired copy was served
+    data, stale = _get(path, params, timeout, refresh)
+    return (data, stale) if with_stale else data
+
+def _get(path, params, timeout, refresh):
+    key = tmdb_cache.make_key(path, params)
+    cached = None if refresh else tmdb_cache.get(key)
+    if cached is not None:
+        status, data = cached
+        return (data if status == 200 else None), False
+
+    # Single-flight: concurrent misses for the same key (from any session's
+    # script thread) wait on the first caller's request instead of sending their own
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+    if not leader:
+        metrics.incr("tmdb.coalesced")
+        return copy.deepcopy(future.result())
+
+    try:
+        result = _fetch(key, path, params, timeout)
+        future.set_result(result)
+        # Followers copy data from the future, so the leader's caller gets a copy too
+        # rather than an object it could mutate while they are copying it
+        return copy.deepcopy(result)
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+def _fetch(key, path, params, timeout):
+    """Send one request through the rate limiter and circuit breaker; returns (data, stale)"""
+    # When TMDB is failing (breaker open) or we'd wait too long for a token,
+    # the last cached response is served even if expired
+    if not breaker.allow():
+        metrics.incr("tmdb.short_circuited")
+        return _stale(key)
+
+    bucket = getattr(_budget, "bucket", None)
+    for attempt in range(2):
+        if (bucket and not bucket.acquire()) or not limiter.acquire():
+            breaker.cancel()
+            return _stale(key)
+        metrics.incr("tmdb.upstream")
+        try:
+            response = tmdb_request(path, params, timeout)
+            if response.status_code == 429:
+                wait = _retry_after(response)
+                limiter.pause(wait)  # Every thread backs off, not just this one
+                metrics.incr("tmdb.rate_limited")
+                if attempt == 0 and wait <= MAX_RETRY_AFTER:
+                    continue
+                breaker.record_failure()
+                return _stale(key)
+            if response.status_code >= 500:
+                breaker.record_failure()
+                return _stale(key)
+            breaker.record_success()
+            if response.status_code == 200:
+                data = response.json()
+                tmdb_cache.put(key, path, 200, data)
+                return data, False
+            if response.status_code == 404:
+                tmdb_cache.put(key, path, 404, None)  # Negative cache for unknown ids
+            return None, False
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print("TMDB error:", path, e)
+            breaker.record_failure()
+            return _stale(key)
+    return _stale(key)
+
+@contextmanager
+def rate_budget(bucket):
+    """Make this thread's upstream requests also take a token from bucket, capping its share of the rate limit"""
+    previous = getattr(_budget, "bucket", None)
+    _budget.bucket = bucket
+    try:
+        yield
+    finally:
+        _budget.bucket = previous
+
+def _retry_after(response):
+    """Seconds from a Retry-After header (TMDB sends seconds), default 1"""
+    try:
+        return max(float(response.headers.get("Retry-After", 1)), 0)
+    except ValueError:
+        return 1
+
+def _stale(key):
+    """(last cached response even if expired, True) for when TMDB can't be used"""
+    cached = tmdb_cache.get(key, allow_stale=True)
+    if cached is None or cached[0] != 200:
+        return None, True
+    metrics.incr("tmdb.stale_served")
+    return cached[1], True
+
+DEGRADED_MESSAGE = "⚠️ TMDB is having trouble right now, so some results may be out of date."
+
+def is_degraded():
+    """True while the circuit breaker is keeping requests away from TMDB"""
+    return breaker.degraded
+
+def show_degraded_banner():
+    """Degraded mode banner for pages while the circuit breaker is open"""
+    if is_degraded():
+        import streamlit as st  # Only pages call this; scripts using tmdb don't need Streamlit
+        st.warning(DEGRADED_MESSAGE)
+
+def get_executor():
+    """Return the bounded thread pool shared by all sessions for batch lookups"""
+    global _executor
+    if _executor is None:
+        with _session_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=POSTER_WORKERS, thread_name_prefix="tmdb")
+    return _executor
+
+def get_background_executor():
+    """Return the small pool background refreshes run on, so they never queue ahead of page requests"""
+    global _background_executor
+    if _background_executor is None:
+        with _session_lock:
+            if _background_executor is None:
+                _background_executor = ThreadPoolExecutor(
+                    max_workers=BACKGROUND_WORKERS, thread_name_prefix="tmdb-background"
+                )
+    return _background_executor
+
+# 🟢 Endpoint Helpers
+def genre_names(media_type, genre_ids):
+    """Map TMDB genre ids to names using the (long-cached) genre list"""
+    names = {g["id"]: g["name"] for g in fetch_genres(media_type)}
+    return [names[g] for g in genre_ids if g in names]
+
+def content_metadata(item, media_type):
+    """Pick the fields stored on watched/liked entries out of a TMDB result or details payload"""
+    release_date = item.get("release_date") or item.get("first_air_date") or ""
+    genre_ids = item.get("genre_ids") or [g["id"] for g in item.get("genres", [])]
+    return {
+        "poster_path": item.get("poster_path"),
+        "genre_ids": genre_ids,
+        "genres": genre_names(media_type, genre_ids),
+        "vote_average": item.get("vote_average"),
+        "release_year": int(release_date[:4]) if release_date[:4].isdigit() else None
+    }
+
+def fetch_details(media_type, item_id):
+    return tmdb_get(f"/{media_type}/{item_id}") or {}
+
+def fetch_genres(media_type):
+    """Return the TMDB genre list ([{id, name}, ...]) for movie or tv"""
+    data = tmdb_get(f"/genre/{media_type}/list")
+    return data.get("genres", []) if data else []
+
+def discover(media_type, params=None):
+    data = tmdb_get(f"/discover/{media_type}", params)
+    return data.get("results", []) if data else []
+
+def search(query, media_type="multi", params=None):
+    query_params = {"query": query}
+    query_params.update(params or {})
+    data = tmdb_get(f"/search/{media_type}", query_params)
+    return data.get("results", []) if data else []
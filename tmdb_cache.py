@@ -0,0 +1,124 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from urllib.parse import urlencode
+
+# Cache Configuration
+CACHE_DIR = os.getenv("TMDB_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+CACHE_PATH = os.path.join(CACHE_DIR, "tmdb_cache.sqlite3")
+MAX_ENTRIES = int(os.getenv("TMDB_CACHE_MAX_ENTRIES", "50000"))
+EVICT_EVERY = 200  # Check the size bound once every N writes
+TOUCH_AFTER = 10 * 60  # A hit refreshes accessed_at only if it is older than this (hits stay read-only)
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+# Per-endpoint TTLs, first match wins
+CACHE_TTLS = [
+    (re.compile(r"^/genre/"), 7 * DAY),
+    (re.compile(r"^/(movie|tv)/popular$"), 15 * MINUTE),
+    (re.compile(r"^/trending/"), 15 * MINUTE),
+    (re.compile(r"^/discover/"), 30 * MINUTE),
+    (re.compile(r"^/search/"), 10 * MINUTE),
+    (re.compile(r"^/(movie|tv)/\d+"), 6 * HOUR),
+    (re.compile(r"^/find/"), 7 * DAY),
+]
+DEFAULT_TTL = 10 * MINUTE
+NEGATIVE_TTL = DAY  # How long a 404 is remembered
+
+_local = threading.local()
+_writes = 0
+_writes_lock = threading.Lock()
+
+def _connect():
+    """Return this thread's SQLite connection, creating the schema on first use"""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        conn = sqlite3.connect(CACHE_PATH, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                status INTEGER NOT NULL,
+                body TEXT,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+        _local.conn = conn
+    return conn
+
+def make_key(path, params=None):
+    """Build a cache key from the endpoint path and its normalized params"""
+    items = sorted((k, str(v)) for k, v in (params or {}).items() if k != "api_key")
+    return f"{path}?{urlencode(items)}" if items else path
+
+def ttl_for(path, status=200):
+    if status == 404:
+        return NEGATIVE_TTL
+    for pattern, ttl in CACHE_TTLS:
+        if pattern.match(path):
+            return ttl
+    return DEFAULT_TTL
+
+def get(key, allow_stale=False):
+    """Return (status, data) for a cached response, or None on a miss"""
+    try:
+        conn = _connect()
+        row = conn.execute(
+            "SELECT status, body, expires_at, accessed_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        status, body, expires_at, accessed_at = row
+        now = time.time()
+        if expires_at < now and not allow_stale:
+            return None
+        # LRU order only needs to be coarse, so most hits skip the write lock
+        if now - accessed_at > TOUCH_AFTER:
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        return status, json.loads(body) if body is not None else None
+    except (sqlite3.Error, ValueError) as e:
+        print("TMDB cache error:", e)
+        return None
+
+def put(key, path, status, data):
+    """Store a response; 404s are stored without a body as negative entries"""
+    global _writes
+    now = time.time()
+    body = json.dumps(data) if data is not None else None
+    try:
+        conn = _connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, status, body, expires_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, status, body, now + ttl_for(path, status), now)
+        )
+        with _writes_lock:
+            _writes += 1
+            should_evict = _writes % EVICT_EVERY == 0
+        if should_evict:
+            evict()
+    except sqlite3.Error as e:
+        print("TMDB cache error:", e)
+
+def evict(max_entries=MAX_ENTRIES):
+    """Drop least recently used entries until the cache fits in max_entries"""
+    conn = _connect()
+    (count,) = conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+    if count > max_entries:
+        conn.execute(
+            "DELETE FROM responses WHERE key IN "
+            "(SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+            (count - max_entries,)
+        )
+
+def clear():
+    _connect().execute("DELETE FROM responses")
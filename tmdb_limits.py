@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import threading
+import metrics
+
+# Rate Limit Configuration
+RATE = float(os.getenv("TMDB_RATE_LIMIT", "40"))  # Requests per second
+BURST = int(os.getenv("TMDB_RATE_BURST", "40"))
+LIMIT_FILE = os.getenv("TMDB_RATE_LIMIT_FILE")  # Share one bucket across worker processes (POSIX only)
+MAX_WAIT = 10  # Longest a caller waits for a token before giving up
+
+# Circuit Breaker Configuration
+FAILURE_THRESHOLD = 5  # Consecutive failures that open the breaker
+OPEN_FOR = 30  # Seconds the breaker stays open before letting a probe through
+
+# 🟢 Token Bucket
+class TokenBucket:
+    """Process-wide token bucket; pause() stops all callers (e.g. for Retry-After)"""
+
+    def __init__(self, rate=RATE, burst=BURST):
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._state = {"tokens": burst, "updated": time.time(), "blocked_until": 0}
+
+    def _take(self, state, now):
+        """Refill state to now and try to take a token; returns seconds to wait (0 if taken)"""
+        state["tokens"] = min(self.burst, state["tokens"] + (now - state["updated"]) * self.rate)
+        state["updated"] = now
+        if now < state["blocked_until"]:
+            return state["blocked_until"] - now
+        if state["tokens"] >= 1:
+            state["tokens"] -= 1
+            return 0
+        return (1 - state["tokens"]) / self.rate
+
+    def _with_state(self, update):
+        with self._lock:
+            return update(self._state)
+
+    def acquire(self, max_wait=MAX_WAIT):
+        """Block until a token is available; returns False if that would take longer than max_wait"""
+        started = time.time()
+        while True:
+            now = time.time()
+            wait = self._with_state(lambda state: self._take(state, now))
+            if wait == 0:
+                metrics.observe("tmdb.throttle_wait_ms", (now - started) * 1000)
+                return True
+            if now - started + wait > max_wait:
+                metrics.incr("tmdb.throttle_timeouts")
+                return False
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Hold every caller back for seconds (a 429's Retry-After)"""
+        until = time.time() + seconds
+        def update(state):
+            state["blocked_until"] = max(state["blocked_until"], until)
+        self._with_state(update)
+
+class FileTokenBucket(TokenBucket):
+    """Token bucket whose state lives in a locked file, shared by every worker on the host"""
+
+    def __init__(self, path, rate=RATE, burst=BURST):
+        super().__init__(rate, burst)
+        self.path = path
+
+    def _with_state(self, update):
+        import fcntl
+        with self._lock, open(self.path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                state = json.loads(f.read() or "null") or dict(self._state)
+            except ValueError:
+                state = dict(self._state)
+            result = update(state)
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps(state))
+            return result
+
+# 🟢 Circuit Breaker
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+STATE_GAUGE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+class CircuitBreaker:
+    """Stops calling TMDB after repeated failures; one probe at a time tests recovery"""
+
+    def __init__(self, threshold=FAILURE_THRESHOLD, open_for=OPEN_FOR):
+        self.threshold = threshold
+        self.open_for = open_for
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _set_state(self, state):
+        self.state = state
+        metrics.set_gauge("tmdb.breaker_state", STATE_GAUGE[state])
+
+    def allow(self):
+        """True if a request may go upstream now"""
+        with self._lock:
+            if self.state == OPEN and time.time() - self._opened_at >= self.open_for:
+                self._set_state(HALF_OPEN)
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def cancel(self):
+        """An allowed request was not sent after all (e.g. throttled locally)"""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            if self.state != CLOSED:
+                self._set_state(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or self._failures >= self.threshold:
+                if self.state != OPEN:
+                    metrics.incr("tmdb.breaker_opened")
+                self._opened_at = time.time()
+                self._set_state(OPEN)
+
+    @property
+    def degraded(self):
+        return self.state != CLOSED
+
+limiter = FileTokenBucket(LIMIT_FILE) if LIMIT_FILE else TokenBucket()
+breaker = CircuitBreaker()